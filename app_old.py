@@ -7,12 +7,20 @@ from conversation_flow import ConversationFlowEngine, ConversationStage
 from nlp_personalization import EmotionalToneAnalyzer, PersonalizationEngine
 import sqlite3
 import json
+import logging
 import openai
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
+# The engine modules log through module loggers; INFO keeps their startup and
+# mode messages visible, LOG_LEVEL=DEBUG traces each call
+logging.basicConfig(
+    level=os.getenv('LOG_LEVEL', 'INFO').upper(),
+    format='%(asctime)s %(levelname)s %(name)s: %(message)s'
+)
+
 app = Flask(__name__)
 app.secret_key = os.environ.get('SECRET_KEY', 'coaching-assistant-secret-key-2024')
 CORS(app)
@@ -3,11 +3,14 @@ from typing import List, Dict, Any, Optional
 from enum import Enum
 import json
 from datetime import datetime
+import logging
 import threading
 import time
 from icf_competencies import ICFCompetencyFramework, ICFCompetency
 from openai_coaching import OpenAICoachingEngine, CoachingContext
 
+logger = logging.getLogger(__name__)
+
 class ConversationStage(Enum):
     INTAKE = "intake"
     EXPLORATION = "exploration"
@@ -44,48 +47,36 @@ class ConversationFlowEngine:
     def _get_openai_coach(self):
         """Get OpenAI coach with timeout handling and detailed logging"""
         if self.openai_coach is None:
-            print("🔍 DEBUG: Starting OpenAI coach initialization...")
+            logger.debug("Starting OpenAI coach initialization")
             
             # Use timeout to prevent indefinite hanging
             initialization_result = [None, None]  # [coach_instance, error]
             
             def init_openai_coach():
                 try:
-                    print("🔍 DEBUG: About to import OpenAICoachingEngine...")
-                    from openai_coaching import OpenAICoachingEngine
-                    print("🔍 DEBUG: OpenAICoachingEngine imported successfully")
-                    
-                    print("🔍 DEBUG: About to create OpenAICoachingEngine instance...")
                     coach = OpenAICoachingEngine()
-                    print("🔍 DEBUG: OpenAICoachingEngine instance created successfully")
-                    
                     initialization_result[0] = coach
-                    print("✅ OpenAI Coach: Initialized successfully with timeout protection")
+                    logger.info("OpenAI coach initialized")
                 except Exception as e:
-                    print(f"❌ DEBUG: OpenAI initialization error: {e}")
-                    print(f"❌ DEBUG: Error type: {type(e).__name__}")
-                    import traceback
-                    traceback.print_exc()
+                    logger.exception("OpenAI coach initialization error: %s", e)
                     initialization_result[1] = e
             
             # Start initialization in a separate thread
-            print("🔍 DEBUG: Starting initialization thread...")
             init_thread = threading.Thread(target=init_openai_coach, daemon=True)
             init_thread.start()
             
             # Wait with timeout (30 seconds max)
-            print("🔍 DEBUG: Waiting for initialization (30s timeout)...")
+            logger.debug("Waiting for OpenAI coach initialization (30s timeout)")
             init_thread.join(timeout=30.0)
             
             if init_thread.is_alive():
-                print("⚠️ DEBUG: OpenAI initialization timed out after 30 seconds - using fallback")
+                logger.warning("OpenAI coach initialization timed out after 30 seconds - using fallback")
                 self.openai_coach = self._create_enhanced_fallback_coach()
             elif initialization_result[0] is not None:
-                print("✅ DEBUG: OpenAI initialization completed successfully")
                 self.openai_coach = initialization_result[0]
             else:
                 error = initialization_result[1] or "Unknown error"
-                print(f"❌ DEBUG: OpenAI initialization failed: {error}")
+                logger.error("OpenAI coach initialization failed: %s", error)
                 self.openai_coach = self._create_enhanced_fallback_coach()
         
         return self.openai_coach
@@ -152,11 +143,9 @@ class ConversationFlowEngine:
             def _get_exploration_response(self, user_input):
                 # Analyze user input for emotional content and themes
                 user_lower = user_input.lower() if user_input else ""
-                print(f"🔍 FALLBACK DEBUG: Processing user input: '{user_input}'")
-                print(f"🔍 FALLBACK DEBUG: Lowercase input: '{user_lower}'")
                 
                 if any(word in user_lower for word in ['procrastination', 'procrastinate', 'putting off', 'delay', 'avoiding']):
-                    print(f"🔍 FALLBACK DEBUG: Detected procrastination keywords!")
+                    logger.debug("Fallback coach: procrastination keywords detected")
                     return {
                         "message": "I hear that procrastination is showing up as a significant challenge for you. That's something many people struggle with, and it takes courage to name it directly. What do you notice about when procrastination tends to happen most for you?",
                         "questions": [
@@ -169,7 +158,7 @@ class ConversationFlowEngine:
                         "demo_mode": True
                     }
                 elif any(word in user_lower for word in ['stressed', 'overwhelmed', 'pressure']):
-                    print(f"🔍 FALLBACK DEBUG: Detected stress keywords!")
+                    logger.debug("Fallback coach: stress keywords detected")
                     return {
                         "message": "I can hear that you're feeling stressed and overwhelmed. That sounds really challenging. What do you think is contributing most to that feeling of pressure?",
                         "questions": [
@@ -182,7 +171,7 @@ class ConversationFlowEngine:
                         "demo_mode": True
                     }
                 elif any(word in user_lower for word in ['confused', 'unclear', 'not sure']):
-                    print(f"🔍 FALLBACK DEBUG: Detected confusion keywords!")
+                    logger.debug("Fallback coach: confusion keywords detected")
                     return {
                         "message": "It sounds like there's some uncertainty here, which is completely understandable. What aspect would you like to get clearer on first?",
                         "questions": [
@@ -195,7 +184,7 @@ class ConversationFlowEngine:
                         "demo_mode": True
                     }
                 elif any(word in user_lower for word in ['focus', 'distracted', 'concentration']):
-                    print(f"🔍 FALLBACK DEBUG: Detected focus keywords!")
+                    logger.debug("Fallback coach: focus keywords detected")
                     return {
                         "message": "Focus and concentration challenges can really impact how we feel about your performance. It sounds like this is affecting you in meaningful ways. What have you noticed about your focus patterns?",
                         "questions": [
@@ -208,7 +197,7 @@ class ConversationFlowEngine:
                         "demo_mode": True
                     }
                 else:
-                    print(f"🔍 FALLBACK DEBUG: No specific keywords detected, using generic response")
+                    logger.debug("Fallback coach: no specific keywords detected, using generic response")
                     return {
                         "message": f"Thank you for sharing that with me. I can sense this is important to you - '{user_input}'. What stands out most to you as we explore this together?",
                         "questions": [
@@ -362,24 +351,17 @@ class ConversationFlowEngine:
     
     def generate_exploration_response(self, state: ConversationState, user_input: str) -> Dict[str, Any]:
         """Generate response for exploration stage using OpenAI intelligent coaching"""
-        print(f"🔍 DEBUG: generate_exploration_response called")
-        print(f"🔍 DEBUG: User input: '{user_input}'")
-        print(f"🔍 DEBUG: Current topic: {state.topic.name if state.topic else 'None'}")
-        
         # Add user input to conversation history
         self._add_to_history(state, "user", user_input)
         
         # Determine which competency to apply based on conversation depth
         conversation_depth = len([msg for msg in state.conversation_history if msg["role"] == "user"])
-        print(f"🔍 DEBUG: Conversation depth: {conversation_depth}")
         
         if conversation_depth <= 2:
             icf_competency = "active_listening"
         else:
             icf_competency = "powerful_questioning"
         
-        print(f"🔍 DEBUG: ICF competency: {icf_competency}")
-        
         # Create coaching context for OpenAI
         coaching_context = CoachingContext(
             topic=state.topic.name if state.topic else "General Coaching",
@@ -390,14 +372,14 @@ class ConversationFlowEngine:
             session_goals=[]  # Could be populated based on user's stated goals
         )
         
-        print(f"🔍 DEBUG: Coaching context topic: {coaching_context.topic}")
-        
         # Generate intelligent response using OpenAI
         coach = self._get_openai_coach()
-        print(f"🔍 DEBUG: Coach type: {type(coach).__name__}")
-        
         ai_response = coach.generate_coaching_response(coaching_context, user_input)
-        print(f"🔍 DEBUG: AI response: {ai_response}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Exploration response: topic=%s depth=%s competency=%s coach=%s response=%s",
+                coaching_context.topic, conversation_depth, icf_competency, type(coach).__name__, ai_response
+            )
         
         return {
             "message": ai_response["message"],
@@ -0,0 +1,21 @@
+"""
+Gunicorn settings for the coaching app.
+
+OpenAI requests block a worker for up to 15 seconds, so the process runs a
+pool of threads (gthread) rather than one sync worker; waiting threads release
+the GIL and the process keeps serving other sessions meanwhile.
+
+Keep a single worker process. Sessions, pending session writes, the response
+cache and the OpenAI rate limits all live in process memory, so a second
+worker would serve its own stale copy of a session and overwrite the other's
+saves. Scale with GUNICORN_THREADS instead.
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = 1
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', '100'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '60'))
+keepalive = 5
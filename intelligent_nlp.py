@@ -9,7 +9,7 @@ import re
 from typing import Dict, List, Any, Optional
 from dataclasses import dataclass
 
-@dataclass
+@dataclass(slots=True)
 class UserContext:
     """Represents the understood context from user input"""
     corrected_text: str
@@ -22,6 +22,12 @@ class UserContext:
     key_themes: List[str]
     sentiment_score: float  # -1 to 1
 
+# Emotion and strength groups used to combine analysis results into themes
+FEAR_EMOTIONS = frozenset({'anxiety', 'doubt'})
+LOW_CONFIDENCE_EMOTIONS = frozenset({'anxiety', 'doubt', 'difficulty'})
+BARRIER_EMOTIONS = frozenset({'anxiety', 'doubt', 'frustration', 'difficulty'})
+CAPABILITY_STRENGTHS = frozenset({'execution', 'analytical'})
+
 class IntelligentContextAnalyzer:
     """Analyzes user input for semantic meaning and context using lightweight processing"""
     
@@ -44,6 +50,11 @@ class IntelligentContextAnalyzer:
             'experiance': 'experience',
             'responsability': 'responsibility'
         }
+        # One alternation (longest first) so correction is a single pass over the text
+        self._spelling_pattern = re.compile(
+            r'\b(' + '|'.join(map(re.escape, sorted(self.spelling_corrections, key=len, reverse=True))) + r')\b',
+            re.IGNORECASE
+        )
         
         self.emotion_patterns = {
             'anxiety': ['scared', 'afraid', 'anxious', 'worried', 'nervous', 'jittery', 'fearful', 'stressed', 'terrified'],
@@ -71,11 +82,8 @@ class IntelligentContextAnalyzer:
     
     def correct_spelling(self, text: str) -> str:
         """Correct common spelling mistakes"""
-        corrected = text
-        for wrong, correct in self.spelling_corrections.items():
-            # Use word boundaries to avoid partial matches
-            corrected = re.sub(r'\b' + re.escape(wrong) + r'\b', correct, corrected, flags=re.IGNORECASE)
-        return corrected
+        # Word boundaries avoid partial matches
+        return self._spelling_pattern.sub(lambda m: self.spelling_corrections[m.group(0).lower()], text)
     
     def analyze_context(self, user_input: str, conversation_history: List[Dict] = None) -> UserContext:
         """Analyze user input for comprehensive context understanding"""
@@ -217,7 +225,7 @@ class IntelligentContextAnalyzer:
         high_count = sum(1 for word in high_confidence_words if word in text_lower)
         low_count = sum(1 for word in low_confidence_words if word in text_lower)
         
-        if any(emotion in emotions for emotion in ['anxiety', 'doubt', 'difficulty']) or low_count > high_count:
+        if not LOW_CONFIDENCE_EMOTIONS.isdisjoint(emotions) or low_count > high_count:
             return 'low'
         elif 'confidence' in emotions or high_count > low_count:
             return 'high'
@@ -246,20 +254,21 @@ class IntelligentContextAnalyzer:
         themes = []
         
         # Theme identification based on combinations
-        if 'procrastination' in challenges and any(emotion in emotions for emotion in ['anxiety', 'doubt']):
+        emotion_set = frozenset(emotions)
+        if 'procrastination' in challenges and emotion_set & FEAR_EMOTIONS:
             themes.append('fear_based_avoidance')
         
         if 'new_tasks' in challenges and 'doubt' in emotions:
             themes.append('comfort_zone_resistance')
             
-        if 'confidence_issues' in challenges or any(emotion in emotions for emotion in ['doubt', 'anxiety']):
+        if 'confidence_issues' in challenges or emotion_set & FEAR_EMOTIONS:
             themes.append('self_worth_concerns')
             
-        if any(strength in strengths for strength in ['execution', 'analytical']) and challenges:
+        if not CAPABILITY_STRENGTHS.isdisjoint(strengths) and challenges:
             themes.append('capability_awareness_gap')
             
         # Add general themes
-        if any(emotion in emotions for emotion in ['anxiety', 'doubt', 'frustration', 'difficulty']):
+        if emotion_set & BARRIER_EMOTIONS:
             themes.append('emotional_barriers')
         
         if challenges:
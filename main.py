@@ -1,17 +1,65 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify
 from flask_cors import CORS
+from flask.json.provider import DefaultJSONProvider
+import atexit
 import sqlite3
 import uuid
+import zlib
 from datetime import datetime
 import json
+import logging
 import os
+import queue
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
 from dotenv import load_dotenv
 import openai
+import requests
+from requests.adapters import HTTPAdapter
+from semantic_cache import SemanticResponseCache
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Load environment variables from .env file
 load_dotenv()
 
+# Production runs at WARNING; set LOG_LEVEL=DEBUG to trace individual requests
+logging.basicConfig(
+    level=os.getenv('LOG_LEVEL', 'WARNING').upper(),
+    format='%(asctime)s %(levelname)s %(name)s: %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    """jsonify()/request.get_json() backed by orjson's C encoder."""
+
+    def dumps(self, obj, **kwargs):
+        # Flask's default() still covers types orjson doesn't know (Decimal, __html__)
+        return orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
 app = Flask(__name__)
+if orjson is not None:
+    app.json = ORJSONProvider(app)
+# Key order is irrelevant to the frontend; skip the sort on every response
+app.json.sort_keys = False
 CORS(app)
 
 # Configure OpenAI API key from environment variable
@@ -20,30 +68,250 @@ openai_api_key = os.getenv('OPENAI_API_KEY')
 # Don't set global api_key to avoid conflicts with new client syntax
 # openai.api_key = os.getenv('OPENAI_API_KEY')
 
-# Simple in-memory storage for testing
-sessions = {}
+# -------------------- In-memory session cache --------------------
+# SQLite is the store of record; this only keeps recently used sessions hot.
+# Least recently used sessions are dropped once SESSION_CACHE_SIZE is reached.
+# A cached session is served as-is and never re-read from SQLite, and its
+# changes reach the database only through this process's deferred writes, so
+# the app must run as a single process (see gunicorn.conf.py).
+SESSION_CACHE_SIZE = int(os.getenv('SESSION_CACHE_SIZE', '10000'))
+
+
+class LRUSessionCache:
+    """Thread-safe, size-bounded session_id -> session mapping."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id, default=None):
+        with self._lock:
+            session = self._data.get(session_id, default)
+            if session_id in self._data:
+                self._data.move_to_end(session_id)
+            return session
+
+    def __getitem__(self, session_id):
+        session = self.get(session_id)
+        if session is None:
+            raise KeyError(session_id)
+        return session
+
+    def __setitem__(self, session_id, session):
+        with self._lock:
+            self._data[session_id] = session
+            self._data.move_to_end(session_id)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __contains__(self, session_id):
+        with self._lock:
+            return session_id in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+
+sessions = LRUSessionCache(SESSION_CACHE_SIZE)
+
+# -------------------- OpenAI rate limiting --------------------
+# Per-worker limits: each server process enforces its own semaphore and token
+# bucket. Set them to the account's documented RPM/concurrency limits divided
+# by the number of worker processes, so bursts queue briefly here instead of
+# tripping 429s at the provider.
+OPENAI_MAX_CONCURRENCY_PER_WORKER = int(os.getenv('OPENAI_MAX_CONCURRENCY_PER_WORKER', '50'))
+OPENAI_REQUESTS_PER_MINUTE_PER_WORKER = int(os.getenv('OPENAI_REQUESTS_PER_MINUTE_PER_WORKER', '3500'))
+OPENAI_QUEUE_TIMEOUT = float(os.getenv('OPENAI_QUEUE_TIMEOUT', '5'))
+
+
+class RateLimiter:
+    """Thread-safe token bucket allowing `rate` requests per `period` seconds."""
+
+    def __init__(self, rate, period=60.0):
+        self.capacity = float(rate)
+        self.tokens = float(rate)
+        self.fill_rate = rate / period
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, timeout=None):
+        """Take one token, waiting up to `timeout` seconds. Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.fill_rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.fill_rate
+            if deadline is not None and now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+openai_semaphore = threading.BoundedSemaphore(OPENAI_MAX_CONCURRENCY_PER_WORKER)
+openai_rate_limiter = RateLimiter(OPENAI_REQUESTS_PER_MINUTE_PER_WORKER, 60.0)
+
+
+# One pooled keep-alive session for all OpenAI calls, so each turn reuses an
+# open TLS connection instead of handshaking with api.openai.com again.
+OPENAI_CHAT_COMPLETIONS_URL = 'https://api.openai.com/v1/chat/completions'
+_openai_http = None
+_openai_http_lock = threading.Lock()
+
+
+def get_openai_http():
+    """Return the process-wide OpenAI HTTP session, creating it on first use.
+    Created lazily so forked gunicorn workers never share a parent's sockets."""
+    global _openai_http
+    if _openai_http is None:
+        with _openai_http_lock:
+            if _openai_http is None:
+                http = requests.Session()
+                http.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=OPENAI_MAX_CONCURRENCY_PER_WORKER))
+                http.headers.update({
+                    'Authorization': f'Bearer {openai_api_key}',
+                    'Content-Type': 'application/json'
+                })
+                _openai_http = http
+    return _openai_http
+
+
+@atexit.register
+def close_openai_http():
+    """Close pooled OpenAI connections on interpreter shutdown."""
+    if _openai_http is not None:
+        _openai_http.close()
+
+
+# -------------------- Prompt token budget --------------------
+OPENAI_INPUT_TOKEN_BUDGET = int(os.getenv('OPENAI_INPUT_TOKEN_BUDGET', '3000'))
+
+try:
+    token_encoding = tiktoken.encoding_for_model('gpt-3.5-turbo') if tiktoken else None
+except Exception as e:
+    logger.warning("tiktoken encoding unavailable, approximating token counts: %s", e)
+    token_encoding = None
+
+
+@lru_cache(maxsize=4096)
+def count_tokens(text):
+    """Token count for a message; ~4 characters per token without tiktoken."""
+    if token_encoding is None:
+        return len(text) // 4 + 1
+    return len(token_encoding.encode(text))
+
+
+def trim_messages_to_budget(messages, budget=OPENAI_INPUT_TOKEN_BUDGET):
+    """Drop the oldest history turns until the prompt fits the token budget.
+    The leading system messages and the current user message (last) are always kept."""
+    tokens = sum(count_tokens(m['content']) for m in messages)
+    first_turn = next((i for i, m in enumerate(messages) if m['role'] != 'system'), len(messages))
+    while tokens > budget and len(messages) - first_turn > 1:
+        tokens -= count_tokens(messages.pop(first_turn)['content'])
+    return messages
+
+
+# -------------------- Coaching prompt --------------------
+COACHING_SYSTEM_PROMPT = """You are an expert ICF-certified executive coach.
+
+Key coaching principles:
+- Use powerful questions to create awareness
+- Listen actively and reflect what you hear
+- Help the client discover their own insights
+- Focus on action and accountability
+- Be empathetic but challenge thinking patterns
+- Never give direct advice - guide discovery
+
+Conversation style:
+- Warm, professional, supportive
+- Ask 1-2 powerful questions per response
+- Acknowledge emotions and patterns
+- Help connect insights to actions
+- Use "I notice..." and "What do you think..." language"""
+
+STAGE_INSTRUCTIONS = {
+    'intake': "Current stage: Intake. Establish rapport, clarify goals, and invite the client to set the focus for today. Ask open, welcoming questions.",
+    'exploration': "Current stage: Exploration. Explore context and patterns, reflect emotions, and deepen awareness without rushing to solutions.",
+    'reflection': "Current stage: Reflection. Help synthesize insights and name learnings; link patterns to desired shifts. Prepare gently for action.",
+    'action_planning': "Current stage: Action Planning. Co-create small, specific next steps, success criteria, and accountability. Keep ownership with the client.",
+    'follow_up': "Current stage: Follow-up. Acknowledge progress and commitments, invite brief reflection, and close with empowerment."
+}
+
+
+# -------------------- Semantic response cache --------------------
+# Replies are written for the conversation so far, so only a session's opening
+# message (alone or right after the canned topic-card exchange) is answered from
+# the cache; those prompts carry nothing client-specific beyond the message itself.
+# SEMANTIC_CACHE_SIZE=0 disables the cache.
+response_cache = SemanticResponseCache(
+    threshold=float(os.getenv('SEMANTIC_CACHE_THRESHOLD', '0.9')),
+    max_entries=int(os.getenv('SEMANTIC_CACHE_SIZE', '256'))
+)
+
+
+def context_free_partition(conversation_history, topic, stage):
+    """Cache partition for a prompt with no client-specific context, or None.
+    conversation_history already ends with the message being answered."""
+    prior = conversation_history[:-1]
+    if not prior:
+        return (topic, stage, 'opening')
+    topic_card = TOPIC_RESPONSES.get(topic)
+    if (topic_card and len(prior) == 2 and prior[0]['content'] == topic
+            and prior[1]['content'] == topic_card['message']):
+        return (topic, stage, 'topic_card')
+    return None
+
+
+@contextmanager
+def openai_request_slot(timeout=OPENAI_QUEUE_TIMEOUT):
+    """Hold a concurrency slot and a rate-limit token for one OpenAI call.
+    Yields False when either could not be obtained within `timeout`."""
+    if not openai_semaphore.acquire(timeout=timeout):
+        yield False
+        return
+    try:
+        yield openai_rate_limiter.acquire(timeout=timeout)
+    finally:
+        openai_semaphore.release()
 
 # -------------------- Stage Flow Helpers --------------------
+def compile_phrase_pattern(phrases):
+    """One regex matching any of the phrases as a plain substring, so a check is a single scan"""
+    return re.compile('|'.join(re.escape(phrase) for phrase in phrases))
+
+
+INSIGHT_PHRASE_PATTERN = compile_phrase_pattern([
+    'i realize', 'i understand', 'i see', 'that makes sense', 'i think', 'i believe',
+    'i learned', 'i discovered', 'now i know', 'now i see', 'looking back'
+])
+READINESS_PHRASE_PATTERN = compile_phrase_pattern([
+    'what should i do', 'what steps', 'what action', 'how can i start', 'where do i begin',
+    'what next', 'how do i', 'how can i', 'plan to', 'i will', 'i am going to'
+])
+FORWARD_COMMITMENT_PATTERN = compile_phrase_pattern([
+    'i will start', 'i will try', 'i will do', 'i will take', 'i will begin',
+    "i'm going to", 'i am going to', 'i plan to', 'my approach will be', 'i commit to'
+])
+WILL_NEGATION_PATTERN = compile_phrase_pattern(['will not', "won't", 'not be able'])
+WILL_ACTION_PATTERN = re.compile(r"\bi will\s+(start|try|do|take|begin|work on|focus on|commit|practice|apply)\b")
+
+
 def detect_insight(text):
     """Heuristic to detect insight-oriented language."""
     if not text:
         return False
-    lower = text.lower()
-    return any(phrase in lower for phrase in [
-        'i realize', 'i understand', 'i see', 'that makes sense', 'i think', 'i believe',
-        'i learned', 'i discovered', 'now i know', 'now i see', 'looking back'
-    ])
+    return INSIGHT_PHRASE_PATTERN.search(text.lower()) is not None
 
 
 def detect_readiness(text):
     """Heuristic to detect readiness for action."""
     if not text:
         return False
-    lower = text.lower()
-    return any(phrase in lower for phrase in [
-        'what should i do', 'what steps', 'what action', 'how can i start', 'where do i begin',
-        'what next', 'how do i', 'how can i', 'plan to', 'i will', 'i am going to'
-    ])
+    return READINESS_PHRASE_PATTERN.search(text.lower()) is not None
 
 
 def is_action_commitment(text):
@@ -52,27 +320,22 @@ def is_action_commitment(text):
         return False
     lower = text.lower()
     # Explicit forward commitments
-    forward_patterns = [
-        'i will start', 'i will try', 'i will do', 'i will take', 'i will begin',
-        "i'm going to", 'i am going to', 'i plan to', 'my approach will be', 'i commit to'
-    ]
-    if any(p in lower for p in forward_patterns):
+    if FORWARD_COMMITMENT_PATTERN.search(lower):
         return True
     # Avoid negations or capability doubts around 'will'
     if 'i will' in lower:
-        if 'will not' in lower or "won't" in lower or 'not be able' in lower:
+        if WILL_NEGATION_PATTERN.search(lower):
             return False
         # Require a verb indicating action shortly after 'i will'
-        import re
-        return re.search(r"\bi will\s+(start|try|do|take|begin|work on|focus on|commit|practice|apply)\b", lower) is not None
+        return WILL_ACTION_PATTERN.search(lower) is not None
     return False
 
 
-def determine_next_stage(current_stage, conversation_history, latest_user_message):
+def determine_next_stage(current_stage, conversation_history, latest_user_message, counters=None):
     """Determine next stage based on conversation depth and signals.
     Stages: intake -> exploration -> reflection -> action_planning -> follow_up
     """
-    depth = len(conversation_history)
+    depth = history_depth(conversation_history, counters)
     current = current_stage or 'intake'
 
     # Commitment phrases move to follow_up from action_planning
@@ -105,6 +368,238 @@ def determine_next_stage(current_stage, conversation_history, latest_user_messag
     # Default: keep current or move cautiously forward
     return current
 
+# -------------------- Session counters --------------------
+# Sessions keep only the last MAX_HISTORY_TURNS turns, so they stay a constant
+# size to serialize and save; older turns move to the history_archive table.
+# Whatever depends on the whole conversation (its depth, closure themes) is
+# tracked in the session's counters instead of read from the history.
+MAX_HISTORY_TURNS = int(os.getenv('MAX_HISTORY_TURNS', '40'))
+MAX_PROMPT_MESSAGE_CHARS = int(os.getenv('MAX_PROMPT_MESSAGE_CHARS', '2000'))
+
+# Words that make a closure theme when any client turn mentions them
+CLOSURE_THEME_WORDS = ('authentic', 'empathy', 'procrastination', 'fear')
+
+
+def new_session_counters():
+    """Running counters kept on the session so nothing has to rescan its history.
+    'turns' counts every entry ever added, including archived ones."""
+    return {'turns': 0, 'fear': 0, 'procrastination': 0, 'previous_topics': [], 'client_mentions': []}
+
+
+def history_depth(conversation_history, counters=None):
+    """Number of entries in the whole conversation, of which the history may hold only the tail."""
+    return counters['turns'] if counters is not None else len(conversation_history)
+
+
+def update_session_counters(counters, entry):
+    """Fold one history entry into the session's running counters."""
+    counters['turns'] += 1
+    content = entry['content'].lower()
+    if entry['role'] == 'user':
+        mentions = counters['client_mentions']
+        for word in CLOSURE_THEME_WORDS:
+            if word in content and word not in mentions:
+                mentions.append(word)
+    topics = counters['previous_topics']
+    if 'fear' in content or 'scared' in content or 'afraid' in content or 'worried' in content:
+        counters['fear'] += 1
+        if 'fear' not in topics:
+            topics.append('fear')
+    if ('stress' in content or 'anxiety' in content or 'anxious' in content) and 'stress' not in topics:
+        topics.append('stress')
+    if 'confidence' in content and 'confidence' not in topics:
+        topics.append('confidence')
+    if 'procrastination' in content or 'procrastinate' in content:
+        counters['procrastination'] += 1
+
+
+def build_session_counters(conversation_history):
+    """Rebuild counters from scratch, e.g. for a session loaded from the database."""
+    counters = new_session_counters()
+    for entry in conversation_history:
+        update_session_counters(counters, entry)
+    return counters
+
+
+def append_to_history(session, role, content):
+    """Append a turn to the session history and update its counters.
+    Only the last MAX_HISTORY_TURNS turns are kept on the session; older ones
+    are moved to the history_archive table."""
+    history = session['conversation_history']
+    entry = {
+        'role': role,
+        'content': content,
+        'timestamp': datetime.now().isoformat()
+    }
+    evicted = None
+    with _session_state_lock:
+        history.append(entry)
+        if 'counters' not in session:
+            session['counters'] = build_session_counters(history)
+        else:
+            update_session_counters(session['counters'], entry)
+        
+        if len(history) > MAX_HISTORY_TURNS:
+            evicted = history[:-MAX_HISTORY_TURNS]
+            del history[:-MAX_HISTORY_TURNS]  # in place: callers may hold this list
+            session['archived_turns'] = session.get('archived_turns', 0) + len(evicted)
+    if evicted:
+        _db_pool.submit(archive_history_turns, session.get('session_id'), evicted)
+
+
+def archive_history_turns(session_id, turns):
+    """Append turns trimmed from a session's history to the archive table."""
+    try:
+        with _db_write_lock:
+            conn = sqlite3.connect('coaching_sessions.db')
+            conn.executemany(
+                'INSERT INTO history_archive (session_id, role, content, timestamp) VALUES (?, ?, ?, ?)',
+                [(session_id, turn['role'], turn['content'], turn.get('timestamp')) for turn in turns]
+            )
+            conn.commit()
+            conn.close()
+    except Exception as e:
+        logger.error("Failed to archive history for session %s: %s", session_id, e)
+
+
+def load_archived_history(session_id):
+    """Turns archived for a session, oldest first."""
+    try:
+        conn = sqlite3.connect('coaching_sessions.db')
+        rows = conn.execute(
+            'SELECT role, content, timestamp FROM history_archive WHERE session_id = ? ORDER BY id',
+            (session_id,)
+        ).fetchall()
+        conn.close()
+    except Exception as e:
+        logger.error("Failed to load archived history for session %s: %s", session_id, e)
+        return []
+    return [{'role': role, 'content': content, 'timestamp': timestamp} for role, content, timestamp in rows]
+
+
+def merge_archived_history(archived, session_data):
+    """The whole conversation: archived turns, then the session's tail. Turns are
+    archived before the trimmed session is saved, so the archive may run ahead of
+    a saved tail; the session's archived_turns says where its tail starts."""
+    return archived[:session_data.get('archived_turns', 0)] + session_data['conversation_history']
+
+# -------------------- Fallback keyword categories --------------------
+# Listed in precedence order: when a message hits several categories the
+# earliest one decides the fallback response.
+FALLBACK_KEYWORD_CATEGORIES = [
+    ('procrastination', ['procrastination', 'procrastinate', 'putting off', 'delay', 'avoiding', 'struggle']),
+    ('fear', ['fear', 'scared', 'afraid', 'failure', 'fail', 'worried']),
+    ('complex_task', ['complex activity', 'assigned', 'complete it on time', 'roadblocks', 'hit roadblocks']),
+    ('physical', ['body', 'shiver', 'sweat', 'profusely', 'physical', 'symptoms', 'jittery', 'gittery', 'run away']),
+    ('goals', ['want to', 'complete tasks', 'on time', 'without procrastination', 'reputation', 'opportunities']),
+]
+FALLBACK_CATEGORY_RANK = {category: rank for rank, (category, _) in enumerate(FALLBACK_KEYWORD_CATEGORIES)}
+FALLBACK_KEYWORD_CATEGORY = {}
+for _category, _keywords in FALLBACK_KEYWORD_CATEGORIES:
+    for _keyword in _keywords:
+        FALLBACK_KEYWORD_CATEGORY.setdefault(_keyword, _category)
+
+# Keywords only match at the start of a word: stems still cover inflections
+# ('fail' -> 'failing', 'delay' -> 'delayed') but no longer fire inside other
+# words ('body' in 'nobody'), and the scan only tries word starts. The
+# lookahead keeps overlapping keywords so every category present is seen.
+FALLBACK_KEYWORD_PATTERN = re.compile(
+    r'\b(?=(' + '|'.join(re.escape(keyword) for keyword in FALLBACK_KEYWORD_CATEGORY) + '))'
+)
+
+
+def match_fallback_category(user_lower):
+    """Highest-precedence keyword category found in a lowercased message, or None."""
+    categories = {FALLBACK_KEYWORD_CATEGORY[match.group(1)] for match in FALLBACK_KEYWORD_PATTERN.finditer(user_lower)}
+    return min(categories, key=FALLBACK_CATEGORY_RANK.__getitem__, default=None)
+
+# -------------------- Topic selection --------------------
+# Opening replies for the topic cards; built once at import, never mutated
+TOPIC_RESPONSES = {
+    'performance_improvement': {
+        'message': "Great! Let's explore Performance Improvement together. I understand you want to enhance your work performance and productivity. What specific aspects of your performance feel most important to address right now?",
+        'questions': [
+            "What specific aspect of your performance would you like to improve?",
+            "What's currently working well in your performance?"
+        ]
+    },
+    'career_development': {
+        'message': "Excellent! Career Development is such an important area. I'm excited to explore your career aspirations and help you identify the next steps.",
+        'questions': [
+            "Where do you see yourself in your career journey?",
+            "What career aspirations are most important to you?"
+        ]
+    },
+    'work_life_balance': {
+        'message': "Thank you for choosing Work-Life Balance. Finding harmony between different aspects of life is crucial for well-being.",
+        'questions': [
+            "How would you describe your current work-life balance?",
+            "What areas of your life feel out of balance?"
+        ]
+    },
+    'leadership_growth': {
+        'message': "Wonderful! Leadership Growth is a powerful area for development. I'm here to support you in discovering your authentic leadership style.",
+        'questions': [
+            "What kind of leader do you want to be?",
+            "What leadership challenges are you currently facing?"
+        ]
+    }
+}
+
+
+# Complete, pre-serialized send-message bodies for the known topic cards as
+# seen by an active session; the card click is answered without any per-request
+# response building or JSON encoding
+TOPIC_RESPONSE_BODIES = {
+    topic: app.json.dumps({
+        **reply,
+        'stage': 'exploration',
+        'competency_applied': 'active_listening',
+        'ai_confidence': 0.9,
+        'demo_mode': True,
+        'emotional_analysis': {'primary_emotion': 'engaged', 'intensity': 0.7},
+        'status': 'active'
+    }) + '\n'
+    for topic, reply in TOPIC_RESPONSES.items()
+}
+
+
+# -------------------- Stored history format --------------------
+# conversation_history is stored as zlib-compressed compact JSON with short
+# keys (r=role, c=content, ts=unix seconds). Rows written before this format
+# hold plain JSON text and are still read as-is.
+def pack_history(history):
+    """Encode a conversation history for the sessions table."""
+    packed = []
+    for entry in history:
+        timestamp = entry.get('timestamp')
+        packed.append({
+            'r': entry['role'],
+            'c': entry['content'],
+            'ts': int(datetime.fromisoformat(timestamp).timestamp()) if timestamp else None
+        })
+    if orjson is not None:
+        encoded = orjson.dumps(packed)
+    else:
+        encoded = json.dumps(packed, separators=(',', ':')).encode('utf-8')
+    return zlib.compress(encoded)
+
+
+def unpack_history(stored):
+    """Decode a stored conversation history in either the packed or the legacy format."""
+    if not stored:
+        return []
+    if isinstance(stored, str):
+        return json.loads(stored)
+    return [
+        {
+            'role': entry['r'],
+            'content': entry['c'],
+            'timestamp': datetime.fromtimestamp(entry['ts']).isoformat() if entry.get('ts') is not None else None
+        }
+        for entry in json.loads(zlib.decompress(stored))
+    ]
+
 # -------------------- Existing DB helpers --------------------
 def init_db():
     """Initialize database"""
@@ -112,6 +607,9 @@ def init_db():
         conn = sqlite3.connect('coaching_sessions.db')
         cursor = conn.cursor()
         
+        # WAL lets readers proceed while a write is in progress; the setting persists in the file
+        cursor.execute("PRAGMA journal_mode=WAL")
+        
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS sessions (
                 id TEXT PRIMARY KEY,
@@ -126,44 +624,142 @@ def init_db():
             )
         ''')
         
+        # Turns trimmed from sessions' conversation_history, one row per turn
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS history_archive (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT NOT NULL,
+                role TEXT,
+                content TEXT,
+                timestamp TIMESTAMP
+            )
+        ''')
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_history_archive_session ON history_archive (session_id)")
+        
         # Add 'status' column if missing (active|paused|completed)
         cursor.execute("PRAGMA table_info(sessions)")
         columns = [row[1] for row in cursor.fetchall()]
         if 'status' not in columns:
             cursor.execute("ALTER TABLE sessions ADD COLUMN status TEXT DEFAULT 'active'")
+        # Number of turns moved to history_archive ahead of the stored conversation_history
+        if 'archived_turns' not in columns:
+            cursor.execute("ALTER TABLE sessions ADD COLUMN archived_turns INTEGER DEFAULT 0")
         
         conn.commit()
         conn.close()
-        print("✅ Database initialized successfully")
+        logger.info("Database initialized")
     except Exception as e:
-        print(f"❌ Database initialization error: {e}")
+        logger.error("Database initialization error: %s", e)
 
 def save_session_to_db(session_id, session_data):
     """Save session to database"""
     try:
-        conn = sqlite3.connect('coaching_sessions.db')
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT OR REPLACE INTO sessions 
-            (id, user_id, topic, current_stage, conversation_history, created_at, updated_at, status)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            session_id,
-            session_data.get('user_id'),
-            session_data.get('topic'),
-            session_data.get('stage'),
-            json.dumps(session_data.get('conversation_history', [])),
-            session_data.get('created_at'),
-            datetime.now().isoformat(),
-            session_data.get('status', 'active')
-        ))
-        
-        conn.commit()
-        conn.close()
-        print(f"✅ Session {session_id} saved to database")
+        with _db_write_lock:
+            conn = sqlite3.connect('coaching_sessions.db')
+            conn.execute("PRAGMA synchronous=NORMAL")
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                INSERT OR REPLACE INTO sessions 
+                (id, user_id, topic, current_stage, conversation_history, created_at, updated_at, status, archived_turns)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                session_id,
+                session_data.get('user_id'),
+                session_data.get('topic'),
+                session_data.get('stage'),
+                pack_history(session_data.get('conversation_history', [])),
+                session_data.get('created_at'),
+                datetime.now().isoformat(),
+                session_data.get('status', 'active'),
+                session_data.get('archived_turns', 0)
+            ))
+            
+            conn.commit()
+            conn.close()
+        logger.debug("Session %s saved to database", session_id)
     except Exception as e:
-        print(f"❌ Failed to save session to database: {e}")
+        logger.error("Failed to save session %s to database: %s", session_id, e)
+
+# -------------------- Deferred session writes --------------------
+# Session writes never run on the request thread. Status changes are queued
+# on a single-worker pool right away; message turns only mark their session
+# dirty and are flushed every SESSION_FLUSH_INTERVAL seconds, so rapid turns
+# in one session collapse into a single write. Both go through the same pool,
+# which keeps writes in submission order and SQLite down to one writer.
+SESSION_FLUSH_INTERVAL = float(os.getenv('SESSION_FLUSH_INTERVAL', '1.0'))
+
+_db_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='session-db')
+_db_write_lock = threading.Lock()  # SQLite allows one writer; serialize ours
+_dirty_sessions = {}
+_dirty_sessions_lock = threading.Lock()
+_session_state_lock = threading.Lock()  # guards history/counters updates against snapshots
+_session_flusher = None
+
+
+def snapshot_session(session_data):
+    """Copy of a session for a background write: its own history list, so request
+    threads appending turns can't change it while it is being packed."""
+    with _session_state_lock:
+        snapshot = dict(session_data)
+        snapshot['conversation_history'] = list(session_data.get('conversation_history', []))
+    return snapshot
+
+
+def flush_dirty_sessions():
+    """Write every session marked dirty since the last flush."""
+    global _dirty_sessions
+    with _dirty_sessions_lock:
+        pending, _dirty_sessions = _dirty_sessions, {}
+    for session_id, session_data in pending.items():
+        save_session_to_db(session_id, snapshot_session(session_data))
+
+
+def _flush_sessions_forever():
+    while True:
+        time.sleep(SESSION_FLUSH_INTERVAL)
+        try:
+            _db_pool.submit(flush_dirty_sessions)
+        except RuntimeError:
+            return  # interpreter shutting down; the atexit flush takes over
+
+
+def mark_session_dirty(session_id, session_data):
+    """Queue a session for the next background flush."""
+    global _session_flusher
+    with _dirty_sessions_lock:
+        _dirty_sessions[session_id] = session_data
+        if _session_flusher is None:
+            # Started lazily so it runs in the worker process, not the gunicorn master
+            _session_flusher = threading.Thread(target=_flush_sessions_forever, name='session-flusher', daemon=True)
+            _session_flusher.start()
+
+
+def save_session_async(session_id, session_data):
+    """Queue an immediate write of a session without blocking the request."""
+    # Snapshot now so later turns and stage/status changes don't race the queued write
+    _db_pool.submit(save_session_to_db, session_id, snapshot_session(session_data))
+
+
+def find_session(session_id):
+    """Look a session up in memory, then among pending writes, then in the database.
+    The in-memory copy wins without checking the database, which is only correct
+    while a single process serves all sessions."""
+    session = sessions.get(session_id)
+    if session is None:
+        with _dirty_sessions_lock:
+            # An evicted session may still have unflushed turns; don't reload a stale copy
+            session = _dirty_sessions.get(session_id)
+        if session is None:
+            session = load_session_from_db(session_id)
+        if session:
+            sessions[session_id] = session
+    return session
+
+
+# The pool drains its queue at shutdown before atexit handlers run, so the
+# final flush writes directly
+atexit.register(flush_dirty_sessions)
 
 def load_session_from_db(session_id):
     """Load session from database"""
@@ -177,37 +773,107 @@ def load_session_from_db(session_id):
         
         if row:
             # Determine column indices safely
-            # Schema: id, user_id, topic, current_stage, conversation_history, insights, actions, created_at, updated_at, status
+            # Schema: id, user_id, topic, current_stage, conversation_history, insights, actions, created_at, updated_at, status, archived_turns
             session_data = {
                 'session_id': row[0],
                 'user_id': row[1],
                 'topic': row[2],
                 'stage': row[3],
-                'conversation_history': json.loads(row[4]) if row[4] else [],
+                'conversation_history': unpack_history(row[4]),
                 'created_at': row[7],
-                'status': row[9] if len(row) > 9 else 'active'
+                'status': row[9] if len(row) > 9 else 'active',
+                'archived_turns': (row[10] if len(row) > 10 else 0) or 0
             }
-            print(f"✅ Session {session_id} loaded from database")
+            # Counters cover the whole conversation, archived turns included
+            archived = load_archived_history(session_id) if session_data['archived_turns'] else []
+            session_data['counters'] = build_session_counters(merge_archived_history(archived, session_data))
+            logger.debug("Session %s loaded from database", session_id)
             return session_data
         else:
-            print(f"❌ Session {session_id} not found in database")
+            logger.debug("Session %s not found in database", session_id)
             return None
     except Exception as e:
-        print(f"❌ Failed to load session from database: {e}")
+        logger.error("Failed to load session %s from database: %s", session_id, e)
+        return None
+
+def read_completion_stream(http_response, on_delta):
+    """Collect a streamed chat completion, passing each content delta to on_delta as it arrives.
+    If the stream breaks after some text was passed on, that partial text is the reply, since
+    the client has already shown it."""
+    http_response.encoding = 'utf-8'  # event streams carry no charset
+    parts = []
+    try:
+        for line in http_response.iter_lines(decode_unicode=True):
+            if not line.startswith('data: '):
+                continue
+            payload = line[len('data: '):]
+            if payload == '[DONE]':
+                break
+            for choice in json.loads(payload).get('choices', []):
+                delta = (choice.get('delta') or {}).get('content')
+                if delta:
+                    parts.append(delta)
+                    on_delta(delta)
+    except Exception as stream_error:
+        if not parts:
+            raise
+        logger.warning("OpenAI stream interrupted, finishing with the partial reply: %s", stream_error)
+    return ''.join(parts).strip()
+
+def call_openai_api(messages, on_delta=None):
+    """Send a chat completion request; returns the reply text, or None if it could not be obtained.
+    With on_delta the completion is streamed and each text fragment is passed to it as it arrives."""
+    logger.debug("Making OpenAI request with %d messages", len(messages))
+    
+    # Use direct requests approach for better reliability
+    try:
+        data = {
+            'model': 'gpt-3.5-turbo',
+            'messages': messages,
+            'max_tokens': 200,
+            'temperature': 0.7
+        }
+        if on_delta is not None:
+            data['stream'] = True
+        
+        with openai_request_slot() as acquired:
+            if not acquired:
+                logger.warning("Local OpenAI rate limit reached, using enhanced fallback")
+                return None
+            http_response = get_openai_http().post(OPENAI_CHAT_COMPLETIONS_URL, json=data, timeout=15, stream=on_delta is not None)
+            
+            if http_response.status_code != 200:
+                logger.warning("OpenAI request failed: %s - %s", http_response.status_code, http_response.text)
+                return None
+            
+            if on_delta is not None:
+                # Read the stream while still holding the slot; the request is in flight until it ends
+                ai_message = read_completion_stream(http_response, on_delta)
+            else:
+                ai_message = http_response.json()['choices'][0]['message']['content'].strip()
+        
+        logger.debug("OpenAI request successful")
+        return ai_message
+            
+    except Exception as api_error:
+        logger.warning("OpenAI API request failed: %s", api_error)
+        error_str = str(api_error).lower()
+        if "quota" in error_str or "billing" in error_str:
+            logger.warning("Likely cause: insufficient quota or billing problem")
+        elif "authentication" in error_str or "api_key" in error_str:
+            logger.warning("Likely cause: API key authentication failed")
         return None
 
-def get_ai_coaching_response(user_message, conversation_history, topic, current_stage=None):
-    """Generate AI-powered adaptive coaching response"""
+def get_ai_coaching_response(user_message, conversation_history, topic, current_stage=None, counters=None, on_delta=None):
+    """Generate AI-powered adaptive coaching response; on_delta receives streamed reply fragments"""
     try:
         # Check if OpenAI API key is available
         if not openai_api_key:
-            print("⚠️ No OpenAI API key found, using enhanced fallback")
-            return get_enhanced_fallback_response(user_message, conversation_history, topic, current_stage)
-        
-        print(f"🔑 OpenAI API key configured: {openai_api_key[:10]}...{openai_api_key[-4:]}")
+            logger.debug("No OpenAI API key configured, using enhanced fallback")
+            return get_enhanced_fallback_response(user_message, conversation_history, topic, current_stage, counters)
         
         # Build conversation context
-        conversation_depth = len(conversation_history)
+        conversation_depth = history_depth(conversation_history, counters)
         closure_guidance = ""
 
         # Correct ordering so higher threshold is evaluated first
@@ -217,43 +883,18 @@ def get_ai_coaching_response(user_message, conversation_history, topic, current_
             closure_guidance = "\n\nIMPORTANT: This conversation is getting deep. Start transitioning toward insights and action. Help the client synthesize what they've learned and identify next steps."
 
         stage = (current_stage or 'intake')
-        if stage == 'intake':
-            stage_instruction = "Current stage: Intake. Establish rapport, clarify goals, and invite the client to set the focus for today. Ask open, welcoming questions."
-        elif stage == 'exploration':
-            stage_instruction = "Current stage: Exploration. Explore context and patterns, reflect emotions, and deepen awareness without rushing to solutions."
-        elif stage == 'reflection':
-            stage_instruction = "Current stage: Reflection. Help synthesize insights and name learnings; link patterns to desired shifts. Prepare gently for action."
-        elif stage == 'action_planning':
-            stage_instruction = "Current stage: Action Planning. Co-create small, specific next steps, success criteria, and accountability. Keep ownership with the client."
-        elif stage == 'follow_up':
-            stage_instruction = "Current stage: Follow-up. Acknowledge progress and commitments, invite brief reflection, and close with empowerment."
-        else:
-            stage_instruction = "Current stage: Exploration."
+        stage_instruction = STAGE_INSTRUCTIONS.get(stage, "Current stage: Exploration.")
         
+        # Static prompt first, byte-identical on every request so the provider can
+        # reuse its cached prefix; everything session-specific follows it
         messages = [
+            {"role": "system", "content": COACHING_SYSTEM_PROMPT},
             {
-                "role": "system", 
-                "content": f"""You are an expert ICF-certified executive coach specializing in {topic}. 
-
-Key coaching principles:
-- Use powerful questions to create awareness
-- Listen actively and reflect what you hear
-- Help the client discover their own insights
-- Focus on action and accountability
-- Be empathetic but challenge thinking patterns
-- Never give direct advice - guide discovery
-
-The client is working on: {topic}
+                "role": "system",
+                "content": f"""The client is working on: {topic}
 
 {stage_instruction}
 
-Conversation style:
-- Warm, professional, supportive
-- Ask 1-2 powerful questions per response
-- Acknowledge emotions and patterns
-- Help connect insights to actions
-- Use "I notice..." and "What do you think..." language
-
 Current conversation depth: {conversation_depth} exchanges{closure_guidance}"""
             }
         ]
@@ -261,60 +902,27 @@ Current conversation depth: {conversation_depth} exchanges{closure_guidance}"""
         # Add conversation history for context
         for entry in conversation_history[-6:]:  # Last 6 messages for context
             role = "assistant" if entry['role'] == 'coach' else "user"
-            messages.append({"role": role, "content": entry['content']})
+            messages.append({"role": role, "content": entry['content'][:MAX_PROMPT_MESSAGE_CHARS]})
         
         # Add current message
-        messages.append({"role": "user", "content": user_message})
+        messages.append({"role": "user", "content": user_message[:MAX_PROMPT_MESSAGE_CHARS]})
+        trim_messages_to_budget(messages)
         
-        print(f"🤖 AI DEBUG: Making OpenAI request with {len(messages)} messages")
-        
-        # Use direct requests approach for better reliability
-        try:
-            import requests
-            import json
-            
-            headers = {
-                'Authorization': f'Bearer {openai_api_key}',
-                'Content-Type': 'application/json'
-            }
-            
-            data = {
-                'model': 'gpt-3.5-turbo',
-                'messages': messages,
-                'max_tokens': 200,
-                'temperature': 0.7
-            }
-            
-            print("🌐 Making direct HTTP request to OpenAI API")
-            http_response = requests.post(
-                'https://api.openai.com/v1/chat/completions',
-                headers=headers,
-                json=data,
-                timeout=15
-            )
-            
-            if http_response.status_code == 200:
-                result = http_response.json()
-                ai_message = result['choices'][0]['message']['content'].strip()
-                print("✅ AI DEBUG: Direct HTTP request successful")
-            else:
-                print(f"❌ HTTP request failed: {http_response.status_code} - {http_response.text}")
-                return get_enhanced_fallback_response(user_message, conversation_history, topic, current_stage)
-                
-        except Exception as api_error:
-            print(f"❌ AI DEBUG: OpenAI API request failed: {api_error}")
-            error_str = str(api_error).lower()
-            if "quota" in error_str or "billing" in error_str:
-                print("💡 Issue: Insufficient quota or billing problem")
-            elif "authentication" in error_str or "api_key" in error_str:
-                print("💡 Issue: API key authentication failed")
-            else:
-                print(f"💡 Issue: {api_error}")
-            return get_enhanced_fallback_response(user_message, conversation_history, topic, current_stage)
+        # Embed the message once for both the lookup and, on a miss, the store
+        cache_partition = context_free_partition(conversation_history, topic, stage)
+        message_embedding = response_cache.embed(user_message) if cache_partition else None
+        ai_message = response_cache.lookup(cache_partition, message_embedding)
+        if ai_message is not None:
+            logger.debug("Semantic cache hit for %s, skipping OpenAI request", cache_partition)
+        else:
+            ai_message = call_openai_api(messages, on_delta)
+            if ai_message is None:
+                return get_enhanced_fallback_response(user_message, conversation_history, topic, current_stage, counters)
+            response_cache.store(cache_partition, message_embedding, ai_message)
         
         # Check if user has already provided action commitments (avoid repeated closure)
         if is_action_commitment(user_message):
-            print(f"🎉 AI DEBUG: User provided action commitments - closing positively")
+            logger.debug("User provided action commitments - closing positively")
             return {
                 'message': f"That's a fantastic commitment! Breaking down complex tasks into smaller, manageable chunks and starting with positive affirmations are powerful strategies. You've shown real insight into how to work with your fear of failure rather than against it. I'm confident these approaches will help you build momentum and confidence. Thank you for this meaningful conversation - you have everything you need to move forward successfully.",
                 'questions': [],
@@ -323,9 +931,9 @@ Current conversation depth: {conversation_depth} exchanges{closure_guidance}"""
             }
         
         # Check if we should drive to closure
-        if should_drive_to_closure(conversation_history, topic):
-            print(f"🔄 AI DEBUG: Driving conversation to closure")
-            closure_response = generate_closure_response(user_message, conversation_history, topic)
+        if should_drive_to_closure(conversation_history, topic, counters):
+            logger.debug("Driving conversation to closure")
+            closure_response = generate_closure_response(user_message, conversation_history, topic, counters)
             return {
                 'message': closure_response['message'],
                 'questions': closure_response['questions'],
@@ -334,10 +942,9 @@ Current conversation depth: {conversation_depth} exchanges{closure_guidance}"""
             }
         
         # Generate complementary reflection questions (not extracted from response)
-        questions = generate_reflection_questions(user_message, ai_message, conversation_history, topic, stage)
+        questions = generate_reflection_questions(user_message, ai_message, conversation_history, topic, stage, counters)
         
-        print(f"✅ AI DEBUG: OpenAI response generated successfully")
-        print(f"🔍 AI DEBUG: Generated {len(questions)} questions: {questions}")
+        logger.debug("OpenAI response generated with %d questions: %s", len(questions), questions)
         return {
             'message': ai_message,
             'questions': questions,
@@ -345,15 +952,25 @@ Current conversation depth: {conversation_depth} exchanges{closure_guidance}"""
         }
         
     except Exception as e:
-        print(f"❌ AI DEBUG: Unexpected error in OpenAI function: {e}")
-        print(f"❌ AI DEBUG: Error type: {type(e).__name__}")
-        import traceback
-        traceback.print_exc()
-        return get_enhanced_fallback_response(user_message, conversation_history, topic, current_stage)
+        logger.exception("Unexpected error generating OpenAI response: %s", e)
+        return get_enhanced_fallback_response(user_message, conversation_history, topic, current_stage, counters)
+
+# Insight and readiness cues that let a long conversation move toward closure
+CLOSURE_CUE_PATTERN = compile_phrase_pattern([
+    'i realize', 'i understand', 'i see', 'that makes sense', 'i think', 'i believe',
+    'i need to', 'i should', 'i want to', 'i will', 'i can', 'now i know',
+    'what should i do', 'how do i', 'what steps', 'what action', 'what next',
+    'how can i start', 'where do i begin', 'what would you recommend'
+])
+CLOSURE_COMMITMENT_PATTERN = compile_phrase_pattern([
+    'i will start', 'i will', 'start breaking down', 'positive affirmation',
+    'break down', 'smaller chunks', 'manageable', 'i plan to', 'my approach will be'
+])
+
 
-def should_drive_to_closure(conversation_history, topic):
+def should_drive_to_closure(conversation_history, topic, counters=None):
     """Determine if conversation should move toward closure"""
-    conversation_depth = len(conversation_history)
+    conversation_depth = history_depth(conversation_history, counters)
     
     # Drive to closure after 14+ exchanges (7+ back-and-forth)
     if conversation_depth >= 14:
@@ -365,33 +982,18 @@ def should_drive_to_closure(conversation_history, topic):
     
     recent_user_messages = [entry['content'].lower() for entry in conversation_history[-4:] if entry['role'] == 'user']
     
-    insight_indicators = [
-        'i realize', 'i understand', 'i see', 'that makes sense', 'i think', 'i believe',
-        'i need to', 'i should', 'i want to', 'i will', 'i can', 'now i know'
-    ]
-    
-    readiness_indicators = [
-        'what should i do', 'how do i', 'what steps', 'what action', 'what next',
-        'how can i start', 'where do i begin', 'what would you recommend'
-    ]
-    
     for message in recent_user_messages:
-        if any(indicator in message for indicator in insight_indicators + readiness_indicators):
+        if CLOSURE_CUE_PATTERN.search(message):
             return True
     
     return False
 
-def generate_closure_response(user_message, conversation_history, topic):
+def generate_closure_response(user_message, conversation_history, topic, counters=None):
     """Generate a response that drives toward action and closure"""
     user_lower = user_message.lower()
     
     # Check if user has already provided action commitments
-    action_indicators = [
-        'i will start', 'i will', 'start breaking down', 'positive affirmation', 
-        'break down', 'smaller chunks', 'manageable', 'i plan to', 'my approach will be'
-    ]
-    
-    if any(indicator in user_lower for indicator in action_indicators):
+    if CLOSURE_COMMITMENT_PATTERN.search(user_lower):
         # User has provided commitments - acknowledge and close positively
         return {
             'message': f"That's a fantastic commitment! Breaking down complex tasks into smaller, manageable chunks and starting with positive affirmations are powerful strategies. You've shown real insight into how to work with your fear of failure rather than against it. I'm confident these approaches will help you build momentum and confidence. Thank you for this meaningful conversation - you have everything you need to move forward successfully.",
@@ -411,17 +1013,21 @@ def generate_closure_response(user_message, conversation_history, topic):
             'stage': 'follow_up'
         }
     
-    # Analyze conversation for key insights (first closure attempt)
+    # Analyze conversation for key insights (first closure attempt); the counters
+    # remember mentions from turns no longer in the history
+    if counters is None:
+        counters = build_session_counters(conversation_history)
+    mentions = counters['client_mentions']
     key_themes = []
     if topic == 'leadership_growth':
-        if any('authentic' in entry['content'].lower() for entry in conversation_history if entry['role'] == 'user'):
+        if 'authentic' in mentions:
             key_themes.append('authenticity')
-        if any('empathy' in entry['content'].lower() for entry in conversation_history if entry['role'] == 'user'):
+        if 'empathy' in mentions:
             key_themes.append('empathy')
     elif topic == 'performance_improvement':
-        if any('procrastination' in entry['content'].lower() for entry in conversation_history if entry['role'] == 'user'):
+        if 'procrastination' in mentions:
             key_themes.append('procrastination')
-        if any('fear' in entry['content'].lower() for entry in conversation_history if entry['role'] == 'user'):
+        if 'fear' in mentions:
             key_themes.append('fear of failure')
     
     # Stage-aware, varied closure prompts
@@ -454,7 +1060,7 @@ def generate_closure_response(user_message, conversation_history, topic):
             selected_questions = variant
             break
     if selected_questions is None:
-        selected_questions = closure_variants[(len(conversation_history) // 3) % len(closure_variants)]
+        selected_questions = closure_variants[(counters['turns'] // 3) % len(closure_variants)]
     
     # Generate closure message
     if key_themes:
@@ -469,13 +1075,13 @@ def generate_closure_response(user_message, conversation_history, topic):
         'stage': 'action_planning'
     }
 
-def generate_reflection_questions(user_message, ai_response, conversation_history, topic, stage):
+def generate_reflection_questions(user_message, ai_response, conversation_history, topic, stage, counters=None):
     """Generate contextual reflection questions based on conversation flow"""
     user_lower = user_message.lower()
-    conversation_depth = len(conversation_history)
+    conversation_depth = history_depth(conversation_history, counters)
     
     # Check if we should drive to closure
-    if should_drive_to_closure(conversation_history, topic):
+    if should_drive_to_closure(conversation_history, topic, counters):
         # Vary closure questions to avoid repetition
         closure_question_sets = [
             [
@@ -596,10 +1202,25 @@ def generate_reflection_questions(user_message, ai_response, conversation_histor
             "How might you apply what you're discovering?"
         ]
 
-def get_enhanced_fallback_response(user_message, conversation_history, topic, current_stage=None):
-    """Enhanced fallback with conversation context awareness"""
+SHARING_INSIGHT_PATTERN = compile_phrase_pattern([
+    'when i started', 'i learned', 'i realized', 'i think', 'i believe',
+    'eventually i', 'i was able to', 'has stayed with me', 'i got better',
+    'i discovered', 'i found that', 'looking back', 'now i see'
+])
+GROWTH_PHRASE_PATTERN = compile_phrase_pattern([
+    'got better', 'improved', 'eventually', 'was able to', 'learned',
+    'overcame', 'managed to', 'succeeded', 'figured out'
+])
+
+
+def get_enhanced_fallback_response(user_message, conversation_history, topic, current_stage=None, counters=None):
+    """Enhanced fallback with conversation context awareness.
+
+    `counters` are the session's running counters (see append_to_history); when
+    omitted they are derived from the last 8 history entries.
+    """
     user_lower = user_message.lower()
-    conversation_depth = len(conversation_history)
+    conversation_depth = history_depth(conversation_history, counters)
     
     # Check if user has already provided action commitments (avoid repeated closure)
     if is_action_commitment(user_message):
@@ -611,58 +1232,32 @@ def get_enhanced_fallback_response(user_message, conversation_history, topic, cu
         }
     
     # Check if we should drive to closure
-    if should_drive_to_closure(conversation_history, topic):
-        return generate_closure_response(user_message, conversation_history, topic)
+    if should_drive_to_closure(conversation_history, topic, counters):
+        return generate_closure_response(user_message, conversation_history, topic, counters)
     
-    # Analyze previous conversation for context and avoid repetition
-    previous_topics = []
-    recent_responses = []
-    procrastination_mentions = 0
-    fear_mentions = 0
-    insight_indicators = []
-    
-    for entry in conversation_history[-8:]:  # Last 8 messages for better context
-        content = entry['content'].lower()
-        if entry['role'] == 'coach':
-            recent_responses.append(content)
-        
-        # Track topics mentioned
-        if 'fear' in content or 'scared' in content or 'afraid' in content or 'worried' in content:
-            previous_topics.append('fear')
-            fear_mentions += 1
-        if 'stress' in content or 'anxiety' in content or 'anxious' in content:
-            previous_topics.append('stress')
-        if 'confidence' in content:
-            previous_topics.append('confidence')
-        if 'procrastination' in content or 'procrastinate' in content:
-            procrastination_mentions += 1
+    # Topics and mention counts tracked incrementally on the session
+    mention_counters = counters if counters is not None else build_session_counters(conversation_history[-8:])
+    previous_topics = mention_counters['previous_topics']
+    procrastination_mentions = mention_counters['procrastination']
+    fear_mentions = mention_counters['fear']
     
     # Detect insight-sharing vs problem-stating
-    sharing_insights = any(phrase in user_lower for phrase in [
-        'when i started', 'i learned', 'i realized', 'i think', 'i believe', 
-        'eventually i', 'i was able to', 'has stayed with me', 'i got better',
-        'i discovered', 'i found that', 'looking back', 'now i see'
-    ])
+    sharing_insights = SHARING_INSIGHT_PATTERN.search(user_lower) is not None
     
     # Detect progress or capability mentions
-    showing_growth = any(phrase in user_lower for phrase in [
-        'got better', 'improved', 'eventually', 'was able to', 'learned',
-        'overcame', 'managed to', 'succeeded', 'figured out'
-    ])
-    
-    # Avoid repetitive responses by checking recent coach messages
-    def response_recently_used(phrase):
-        return any(phrase.lower() in response for response in recent_responses[-2:])
+    showing_growth = GROWTH_PHRASE_PATTERN.search(user_lower) is not None
     
     # Enhanced keyword detection with progression-based responses
     
+    category = match_fallback_category(user_lower)
+    
     # Procrastination responses - vary based on conversation depth and mentions
-    if any(word in user_lower for word in ['procrastination', 'procrastinate', 'putting off', 'delay', 'avoiding', 'struggle']):
+    if category == 'procrastination':
         if procrastination_mentions == 0:  # First mention
             message = "I hear that procrastination is showing up as a significant challenge for you. That takes courage to name directly. What do you notice about when procrastination tends to happen most for you?"
             return {
                 'message': message,
-                'questions': generate_reflection_questions(user_message, message, conversation_history, topic, current_stage or 'exploration')
+                'questions': generate_reflection_questions(user_message, message, conversation_history, topic, current_stage or 'exploration', counters)
             }
         elif procrastination_mentions == 1:  # Second mention - dig deeper
             return {
@@ -682,7 +1277,7 @@ def get_enhanced_fallback_response(user_message, conversation_history, topic, cu
             }
     
     # Fear and failure responses - progressive depth with better progression
-    elif any(word in user_lower for word in ['fear', 'scared', 'afraid', 'failure', 'fail', 'worried']):
+    elif category == 'fear':
         if fear_mentions == 0:  # First fear mention
             return {
                 'message': "I can hear that fear is playing a significant role in your experience. Fear of failure is incredibly common, and it takes real courage to name it. What do you think this fear is trying to protect you from?",
@@ -735,7 +1330,7 @@ def get_enhanced_fallback_response(user_message, conversation_history, topic, cu
                 }
     
     # Complex tasks and time pressure responses
-    elif any(word in user_lower for word in ['complex activity', 'assigned', 'complete it on time', 'roadblocks', 'hit roadblocks']):
+    elif category == 'complex_task':
         if showing_growth:
             return {
                 'message': "I'm struck by something important in what you shared - you mentioned hitting roadblocks when coding but eventually getting better at it. That tells me you have experience working through complexity and succeeding. What helped you persist through those coding challenges?",
@@ -754,7 +1349,7 @@ def get_enhanced_fallback_response(user_message, conversation_history, topic, cu
             }
     
     # Physical symptoms and body responses - validate and explore
-    elif any(word in user_lower for word in ['body', 'shiver', 'sweat', 'profusely', 'physical', 'symptoms', 'jittery', 'gittery', 'run away']):
+    elif category == 'physical':
         return {
             'message': "I can hear how intensely your body is responding to these challenging situations. Your body is giving you important information about your stress response. It sounds like your nervous system is trying to protect you. What helps you feel most grounded when you notice these physical reactions?",
             'questions': [
@@ -764,7 +1359,7 @@ def get_enhanced_fallback_response(user_message, conversation_history, topic, cu
         }
     
     # Goals and aspirations - shift toward action
-    elif any(word in user_lower for word in ['want to', 'complete tasks', 'on time', 'without procrastination', 'reputation', 'opportunities']):
+    elif category == 'goals':
         if conversation_depth >= 4:  # Later in conversation - focus on concrete steps
             return {
                 'message': "I hear how important this is to you - completing tasks on time and protecting your reputation. Given everything we've discussed about fear and procrastination, what would be one specific strategy you could try this week?",
@@ -809,8 +1404,7 @@ def get_enhanced_fallback_response(user_message, conversation_history, topic, cu
             ]
         }
     else:
-        # Fix the set slicing bug by converting to list first
-        unique_topics = list(set(previous_topics))[:2]
+        unique_topics = previous_topics[:2]
         theme_text = f" building on what we've discussed about {', '.join(unique_topics)}" if unique_topics else ""
         return {
             'message': f"I can hear the depth of what you're sharing{theme_text}. What insight or awareness is emerging for you as we talk about this?",
@@ -839,26 +1433,16 @@ def health_check():
 def start_session():
     """Start a new coaching session - AI POWERED VERSION"""
     try:
-        print(f"🔍 AI START_SESSION: Starting new session...")
-        print(f"🔍 AI START_SESSION: Request method: {request.method}")
-        print(f"🔍 AI START_SESSION: Request content type: {request.content_type}")
-        
         # Check if request has JSON data
         data = None
         if request.content_type and 'application/json' in request.content_type:
             data = request.get_json()
-            print(f"🔍 AI START_SESSION: Request data: {data}")
-        else:
-            print(f"🔍 AI START_SESSION: No JSON data in request")
+        logger.debug("Starting new session, request data: %s", data)
         
-        print(f"🔍 AI START_SESSION: Generating IDs...")
         provided_user_id = (data or {}).get('user_id')
         user_id = provided_user_id or str(uuid.uuid4())
         session_id = str(uuid.uuid4())
         
-        print(f"🔍 AI START_SESSION: user_id={user_id}, session_id={session_id}")
-        
-        print(f"🔍 AI START_SESSION: Creating session object...")
         # Store in memory with conversation history
         session_data = {
             'user_id': user_id,
@@ -866,18 +1450,16 @@ def start_session():
             'stage': 'intake',
             'topic': None,
             'conversation_history': [],
+            'counters': new_session_counters(),
             'created_at': datetime.now().isoformat(),
             'closure_attempts': 0,
             'last_questions': [],
             'status': 'active' # Initialize status
         }
         
-        print(f"🔍 AI START_SESSION: Storing session in memory and database...")
         sessions[session_id] = session_data
-        save_session_to_db(session_id, session_data)
-        print(f"🔍 AI START_SESSION: Session stored. Total sessions: {len(sessions)}")
+        save_session_async(session_id, session_data)
         
-        print(f"🔍 AI START_SESSION: Creating response object...")
         # Simple response
         response_data = {
             'message': 'Welcome to your coaching session! I\'m here to support you in exploring what\'s important to you. This is a confidential space where you can share openly.',
@@ -890,36 +1472,115 @@ def start_session():
             'available_topics': ['performance_improvement', 'career_development', 'work_life_balance', 'leadership_growth']
         }
         
-        print(f"🔍 AI START_SESSION: Creating final JSON response...")
         final_response = {
             'session_id': session_id,
             'user_id': user_id,
             'response': response_data
         }
         
-        print(f"✅ AI START_SESSION: Session created successfully")
+        logger.debug("Session %s created for user %s", session_id, user_id)
         return jsonify(final_response)
         
     except Exception as e:
-        print(f"❌ AI START_SESSION: Error occurred: {e}")
-        print(f"❌ AI START_SESSION: Error type: {type(e).__name__}")
-        import traceback
-        print(f"❌ AI START_SESSION: Full traceback:")
-        traceback.print_exc()
-        
+        logger.exception("Failed to start session: %s", e)
         error_response = {'error': f'Failed to start session: {str(e)}'}
-        print(f"❌ AI START_SESSION: Returning error response: {error_response}")
         return jsonify(error_response), 500
 
+def finalize_turn(session_id, session, response, next_stage_prediction):
+    """Record the coach reply on the session, settle its stage and complete the response payload"""
+    # Add coach response to history
+    append_to_history(session, 'coach', response['message'])
+    
+    # Persist stage carefully: prefer explicit stage from response if provided, else use predicted next stage
+    if 'stage' in response and response['stage']:
+        session['stage'] = response['stage']
+    else:
+        session['stage'] = next_stage_prediction
+    
+    # Track closure attempts and provide natural ending if repeated
+    if session['stage'] in ['action_planning', 'follow_up']:
+        session['closure_attempts'] = session.get('closure_attempts', 0) + 1
+        if session['closure_attempts'] >= 2 and session['stage'] != 'follow_up':
+            # Escalate to a natural close without more questions
+            response['message'] = (
+                "Thank you for the depth you've brought to this conversation. You've identified meaningful insights and the next steps that matter. "
+                "I'll leave you with confidence in your ability to follow through. If you'd like, we can check in next time on what you learned."
+            )
+            response['questions'] = []
+            session['stage'] = 'follow_up'
+    else:
+        # Reset attempts if not in closing phases
+        session['closure_attempts'] = 0
+    
+    # Persist on the next background flush rather than on the request path
+    mark_session_dirty(session_id, session)
+    
+    # Update response with standard fields without overriding explicit stage
+    response.update({
+        'stage': session['stage'],
+        'competency_applied': 'active_listening',
+        'ai_confidence': 0.9,
+        'demo_mode': not response.get('ai_powered', False),  # True only if NOT AI-powered
+        'emotional_analysis': {'primary_emotion': 'engaged', 'intensity': 0.7},
+        'status': session.get('status', 'active')
+    })
+    return response
+
+
+def select_topic(session_id, session, topic):
+    """Fast path for a known topic card: record the canned exchange and return its prebuilt body"""
+    append_to_history(session, 'user', topic)
+    append_to_history(session, 'coach', TOPIC_RESPONSES[topic]['message'])
+    session['topic'] = topic
+    session['stage'] = 'exploration'
+    session['closure_attempts'] = 0
+    mark_session_dirty(session_id, session)
+    return app.response_class(TOPIC_RESPONSE_BODIES[topic], mimetype='application/json')
+
+
+def stream_coaching_turn(session_id, session, user_message, topic, current_stage, next_stage_prediction):
+    """Server-sent events for one coaching turn: 'delta' events while the AI reply streams in,
+    then a 'done' event with the same payload the JSON endpoint returns. When the final message
+    is not the streamed text (a fallback or closure reply replaced it), a 'reset' event tells the
+    client to discard the deltas first. The reply is produced on a separate thread so the session
+    is still updated if the client disconnects mid-stream."""
+    events = queue.Queue()
+    
+    def produce():
+        streamed = []
+        
+        def on_delta(text):
+            streamed.append(text)
+            events.put(('delta', {'text': text}))
+        
+        try:
+            response = get_ai_coaching_response(
+                user_message, session.get('conversation_history', []), topic, current_stage,
+                session.get('counters'), on_delta=on_delta
+            )
+            if streamed and response['message'] != ''.join(streamed).strip():
+                events.put(('reset', {}))
+            events.put(('done', finalize_turn(session_id, session, response, next_stage_prediction)))
+        except Exception as e:
+            logger.exception("Unexpected error streaming coaching turn: %s", e)
+            events.put(('error', {
+                'error': 'Internal server error',
+                'message': "I apologize, but I'm experiencing a technical issue. Could you please try again?"
+            }))
+    
+    threading.Thread(target=produce, name='coaching-stream', daemon=True).start()
+    while True:
+        event, payload = events.get()
+        yield f"event: {event}\ndata: {app.json.dumps(payload)}\n\n"
+        if event not in ('delta', 'reset'):
+            return
+
 @app.route('/api/send-message', methods=['POST'])
 def send_message():
     """Process user message - AI ADAPTIVE VERSION"""
     try:
-        print(f"🔍 AI SEND_MESSAGE: Starting...")
-        
         # Validate request data
         if not request.json:
-            print(f"❌ AI SEND_MESSAGE: No JSON data in request")
             return jsonify({'error': 'No JSON data provided'}), 400
         
         data = request.json
@@ -927,82 +1588,40 @@ def send_message():
         user_message = data.get('message')
         message_type = data.get('type', 'text')
         
-        print(f"🔍 AI SEND_MESSAGE: session_id={session_id}, message='{user_message}', type={message_type}")
+        logger.debug("send_message: session_id=%s type=%s message=%r", session_id, message_type, user_message)
         
         if not session_id or not user_message:
-            print(f"❌ AI SEND_MESSAGE: Missing required fields")
             return jsonify({'error': 'Missing session_id or message'}), 400
         
         # Check if session exists in memory first, then database
-        session = None
-        if session_id in sessions:
-            session = sessions[session_id]
-            print(f"🔍 AI SEND_MESSAGE: Session found in memory")
-        else:
-            print(f"🔍 AI SEND_MESSAGE: Session not in memory, checking database...")
-            session = load_session_from_db(session_id)
-            if session:
-                sessions[session_id] = session  # Cache in memory
-                print(f"🔍 AI SEND_MESSAGE: Session loaded from database and cached")
+        session = find_session(session_id)
         
         if not session:
-            print(f"❌ AI SEND_MESSAGE: Session {session_id} not found in memory or database")
-            print(f"🔍 Available sessions: {list(sessions.keys())}")
+            logger.debug("Session %s not found in memory or database", session_id)
             return jsonify({'error': 'Session not found'}), 404
-        print(f"🔍 AI SEND_MESSAGE: Session found, current topic: {session.get('topic')}")
         
         # Auto-resume if paused and user sends a message
         if session.get('status') == 'paused':
             session['status'] = 'active'
-            print("🔄 AI SEND_MESSAGE: Auto-resuming paused session due to incoming message")
+            logger.debug("Auto-resuming paused session %s due to incoming message", session_id)
+
+        # Topic cards need neither stage prediction nor the AI; answer from the prebuilt body
+        if message_type == 'topic_selection' and user_message in TOPIC_RESPONSE_BODIES and session.get('status', 'active') == 'active':
+            return select_topic(session_id, session, user_message)
 
         # Add user message to conversation history
-        session['conversation_history'].append({
-            'role': 'user',
-            'content': user_message,
-            'timestamp': datetime.now().isoformat()
-        })
+        append_to_history(session, 'user', user_message)
         
         # Determine next stage pre-AI for guidance
         current_stage = session.get('stage', 'intake')
-        next_stage_prediction = determine_next_stage(current_stage, session.get('conversation_history', []), user_message)
+        next_stage_prediction = determine_next_stage(
+            current_stage, session.get('conversation_history', []), user_message, session.get('counters')
+        )
         
         # Process different message types
         if message_type == 'topic_selection':
-            print(f"🔍 AI SEND_MESSAGE: Processing topic selection: {user_message}")
-            
-            topic_responses = {
-                'performance_improvement': {
-                    'message': "Great! Let's explore Performance Improvement together. I understand you want to enhance your work performance and productivity. What specific aspects of your performance feel most important to address right now?",
-                    'questions': [
-                        "What specific aspect of your performance would you like to improve?",
-                        "What's currently working well in your performance?"
-                    ]
-                },
-                'career_development': {
-                    'message': "Excellent! Career Development is such an important area. I'm excited to explore your career aspirations and help you identify the next steps.",
-                    'questions': [
-                        "Where do you see yourself in your career journey?",
-                        "What career aspirations are most important to you?"
-                    ]
-                },
-                'work_life_balance': {
-                    'message': "Thank you for choosing Work-Life Balance. Finding harmony between different aspects of life is crucial for well-being.",
-                    'questions': [
-                        "How would you describe your current work-life balance?",
-                        "What areas of your life feel out of balance?"
-                    ]
-                },
-                'leadership_growth': {
-                    'message': "Wonderful! Leadership Growth is a powerful area for development. I'm here to support you in discovering your authentic leadership style.",
-                    'questions': [
-                        "What kind of leader do you want to be?",
-                        "What leadership challenges are you currently facing?"
-                    ]
-                }
-            }
-            
-            response = topic_responses.get(user_message, {
+            # Copied because finalize_turn adds per-session fields to the response
+            response = dict(TOPIC_RESPONSES.get(user_message) or {
                 'message': f"Thank you for selecting {user_message}. Let's explore this together.",
                 'questions': ["What would you like to focus on first?", "What's most important to you about this topic?"]
             })
@@ -1013,72 +1632,37 @@ def send_message():
             
         else:
             # Use AI-powered adaptive response
-            print(f"🔍 AI SEND_MESSAGE: Generating AI response...")
-            
             topic = session.get('topic', 'performance improvement')
             conversation_history = session.get('conversation_history', [])
             current_stage = next_stage_prediction  # Pass predicted next stage for better alignment
             
+            # Opt-in server-sent events: reply text is forwarded as the model generates it
+            if data.get('stream'):
+                return Response(
+                    stream_coaching_turn(session_id, session, user_message, topic, current_stage, next_stage_prediction),
+                    mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+                )
+            
             try:
-                response = get_ai_coaching_response(user_message, conversation_history, topic, current_stage)
-                print(f"🔍 AI SEND_MESSAGE: AI response generated: {response.get('ai_powered', False)}")
+                response = get_ai_coaching_response(
+                    user_message, conversation_history, topic, current_stage, session.get('counters')
+                )
             except Exception as ai_error:
-                print(f"❌ AI SEND_MESSAGE: AI response generation failed: {ai_error}")
+                logger.exception("AI response generation failed: %s", ai_error)
                 # Fallback to simple response
                 response = {
                     'message': "Thank you for sharing that. I'm here to support you in exploring this further. What feels most important to focus on right now?",
                     'questions': ["What would you like to explore next?", "How can I best support you with this?"]
                 }
         
-        # Add coach response to history
-        session['conversation_history'].append({
-            'role': 'coach',
-            'content': response['message'],
-            'timestamp': datetime.now().isoformat()
-        })
+        response = finalize_turn(session_id, session, response, next_stage_prediction)
         
-        # Persist stage carefully: prefer explicit stage from response if provided, else use predicted next stage
-        if 'stage' in response and response['stage']:
-            session['stage'] = response['stage']
-        else:
-            session['stage'] = next_stage_prediction
-        
-        # Track closure attempts and provide natural ending if repeated
-        if session['stage'] in ['action_planning', 'follow_up']:
-            session['closure_attempts'] = session.get('closure_attempts', 0) + 1
-            if session['closure_attempts'] >= 2 and session['stage'] != 'follow_up':
-                # Escalate to a natural close without more questions
-                response['message'] = (
-                    "Thank you for the depth you've brought to this conversation. You've identified meaningful insights and the next steps that matter. "
-                    "I'll leave you with confidence in your ability to follow through. If you'd like, we can check in next time on what you learned."
-                )
-                response['questions'] = []
-                session['stage'] = 'follow_up'
-        else:
-            # Reset attempts if not in closing phases
-            session['closure_attempts'] = 0
-        
-        # Save updated session to database
-        save_session_to_db(session_id, session)
-        
-        # Update response with standard fields without overriding explicit stage
-        response.update({
-            'stage': session['stage'],
-            'competency_applied': 'active_listening',
-            'ai_confidence': 0.9,
-            'demo_mode': not response.get('ai_powered', False),  # True only if NOT AI-powered
-            'emotional_analysis': {'primary_emotion': 'engaged', 'intensity': 0.7},
-            'status': session.get('status', 'active')
-        })
-        
-        print(f"✅ AI SEND_MESSAGE: Response generated successfully")
+        logger.debug("Response generated for session %s (ai_powered=%s)", session_id, response.get('ai_powered', False))
         return jsonify(response)
         
     except Exception as e:
-        print(f"❌ AI SEND_MESSAGE: Unexpected error: {e}")
-        print(f"❌ AI SEND_MESSAGE: Error type: {type(e).__name__}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Unexpected error in send_message: %s", e)
         
         # Return a safe fallback response
         return jsonify({
@@ -1116,12 +1700,17 @@ def list_sessions():
 
 @app.route('/api/session/<session_id>', methods=['GET'])
 def get_session(session_id):
-    session = sessions.get(session_id) or load_session_from_db(session_id)
+    session = find_session(session_id)
     if not session:
         return jsonify({'error': 'Session not found'}), 404
-    # Cache if loaded
-    sessions[session_id] = session
-    return jsonify(session)
+    snapshot = snapshot_session(session)
+    if snapshot.get('archived_turns'):
+        # The session holds only its recent turns; read the rest on the write
+        # queue so turns archived moments ago are already there
+        archived = _db_pool.submit(load_archived_history, session_id).result()
+        snapshot['conversation_history'] = merge_archived_history(archived, snapshot)
+    # Counters and the archive offset are internal bookkeeping
+    return jsonify({key: value for key, value in snapshot.items() if key not in ('counters', 'archived_turns')})
 
 @app.route('/api/pause-session', methods=['POST'])
 def pause_session():
@@ -1129,12 +1718,12 @@ def pause_session():
     session_id = data.get('session_id')
     if not session_id:
         return jsonify({'error': 'session_id is required'}), 400
-    session = sessions.get(session_id) or load_session_from_db(session_id)
+    session = find_session(session_id)
     if not session:
         return jsonify({'error': 'Session not found'}), 404
     session['status'] = 'paused'
     sessions[session_id] = session
-    save_session_to_db(session_id, session)
+    save_session_async(session_id, session)
     return jsonify({'ok': True, 'session_id': session_id, 'status': 'paused'})
 
 @app.route('/api/resume-session', methods=['POST'])
@@ -1143,12 +1732,12 @@ def resume_session():
     session_id = data.get('session_id')
     if not session_id:
         return jsonify({'error': 'session_id is required'}), 400
-    session = sessions.get(session_id) or load_session_from_db(session_id)
+    session = find_session(session_id)
     if not session:
         return jsonify({'error': 'Session not found'}), 404
     session['status'] = 'active'
     sessions[session_id] = session
-    save_session_to_db(session_id, session)
+    save_session_async(session_id, session)
     return jsonify({'ok': True, 'session_id': session_id, 'status': 'active'})
 
 # New route: resume latest session for a user
@@ -1164,7 +1753,7 @@ def resume_latest():
             return jsonify({'error': 'No prior sessions found for this user'}), 404
         existing['status'] = 'active'
         sessions[existing['session_id']] = existing
-        save_session_to_db(existing['session_id'], existing)
+        save_session_async(existing['session_id'], existing)
         return jsonify({
             'ok': True,
             'session_id': existing['session_id'],
@@ -1184,20 +1773,16 @@ def relink_session():
         new_user_id = data.get('new_user_id')
         if not session_id or not new_user_id:
             return jsonify({'error': 'session_id and new_user_id are required'}), 400
-        # Verify session exists
-        existing = load_session_from_db(session_id)
-        if not existing:
+        # Relink the live copy so unflushed turns keep the new owner, and write it
+        # through the same queue as every other session update
+        session = find_session(session_id)
+        if not session:
             return jsonify({'error': 'Session not found'}), 404
-        # Update DB
-        conn = sqlite3.connect('coaching_sessions.db')
-        cursor = conn.cursor()
-        cursor.execute('UPDATE sessions SET user_id = ?, updated_at = ? WHERE id = ?', (new_user_id, datetime.now().isoformat(), session_id))
-        conn.commit()
-        conn.close()
-        # Update cache
-        existing['user_id'] = new_user_id
-        existing['status'] = existing.get('status', 'paused')
-        sessions[session_id] = existing
+        with _session_state_lock:
+            session['user_id'] = new_user_id
+            session.setdefault('status', 'paused')
+        sessions[session_id] = session
+        save_session_async(session_id, session)
         return jsonify({'ok': True, 'session_id': session_id, 'user_id': new_user_id})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -1230,7 +1815,12 @@ def recent_sessions():
 	except Exception as e:
 		return jsonify({'error': str(e)}), 500
 
+# Runs on import so gunicorn workers (which never execute __main__) get the schema too
+init_db()
+
 if __name__ == '__main__':
-    print("🚀 Starting AI-powered adaptive coaching app...")
-    init_db()
-    app.run(host='0.0.0.0', port=5000, debug=True) 
+    # Local development only; production serves main:app with gunicorn (see gunicorn.conf.py)
+    logger.info("Starting AI-powered adaptive coaching app")
+    port = int(os.environ.get('PORT', 5000))
+    debug_mode = os.environ.get('FLASK_ENV') == 'development'
+    app.run(host='0.0.0.0', port=port, debug=debug_mode, threaded=True)
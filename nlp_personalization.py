@@ -1,10 +1,18 @@
 from dataclasses import dataclass
 from typing import Dict, List, Any, Optional
+import atexit
 import json
-from textblob import TextBlob
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 import sqlite3
 
+logger = logging.getLogger(__name__)
+
 @dataclass
 class EmotionalTone:
     sentiment: str  # positive, negative, neutral
@@ -21,34 +29,88 @@ class UserProfile:
     learning_style: str  # visual, auditory, kinesthetic, reading
     session_history: List[Dict[str, Any]]
 
+# Lexicon, keyword tables and templates are built once per process and
+# shared by every analyzer/engine instance; treat them as read-only
+_VADER = SentimentIntensityAnalyzer()
+
+_EMOTION_KEYWORDS: Dict[str, List[str]] = {
+    "anxiety": ["worried", "nervous", "anxious", "stressed", "overwhelmed", "panic", "fear"],
+    "frustration": ["frustrated", "annoyed", "irritated", "stuck", "blocked", "impossible"],
+    "excitement": ["excited", "thrilled", "enthusiastic", "motivated", "energized", "pumped"],
+    "confusion": ["confused", "unclear", "lost", "don't understand", "mixed up", "puzzled"],
+    "confidence": ["confident", "sure", "certain", "capable", "strong", "ready"],
+    "sadness": ["sad", "disappointed", "down", "discouraged", "hopeless", "defeated"],
+    "hope": ["hopeful", "optimistic", "positive", "better", "improving", "progress"],
+    "anger": ["angry", "mad", "furious", "upset", "outraged", "livid"]
+}
+
+_KEYWORD_EMOTIONS = {keyword: emotion
+                     for emotion, keywords in _EMOTION_KEYWORDS.items()
+                     for keyword in keywords}
+
+# One pass over the text finds every keyword; the lookahead keeps
+# overlapping matches, so this agrees with a per-keyword substring test
+_EMOTION_PATTERN = re.compile(
+    "(?=(" + "|".join(map(re.escape, _KEYWORD_EMOTIONS)) + "))"
+)
+
+_RESPONSE_TEMPLATES: Dict[str, Dict[str, str]] = {
+    "supportive": {
+        "high_anxiety": "I can sense this feels overwhelming right now. Let's take this one step at a time.",
+        "frustration": "It sounds like this has been really challenging for you. Your frustration is completely understandable.",
+        "low_confidence": "I hear some uncertainty in what you're sharing. What would help you feel more confident about this?",
+        "excitement": "I can feel your energy and enthusiasm! This excitement can be a powerful resource.",
+        "default": ""  # Empty to avoid interference with OpenAI responses
+    },
+    "challenging": {
+        "high_anxiety": "What would happen if you approached this with curiosity rather than worry?",
+        "frustration": "What assumptions might be contributing to this frustration?",
+        "low_confidence": "What evidence do you have that contradicts this doubt?",
+        "excitement": "How can you channel this excitement into focused action?",
+        "default": ""  # Empty to avoid interference with OpenAI responses
+    },
+    "direct": {
+        "high_anxiety": "Let's focus on what you can control right now.",
+        "frustration": "What specific action will move you forward?",
+        "low_confidence": "What's the smallest step you could take today?",
+        "excitement": "What's your next concrete step?",
+        "default": ""  # Empty to avoid interference with OpenAI responses
+    }
+}
+
+# (communication_style, template_key) -> message, so a lookup is one tuple hash
+_TEMPLATE_TABLE: Dict[tuple, str] = {(style, key): message
+                                     for style, templates in _RESPONSE_TEMPLATES.items()
+                                     for key, message in templates.items()}
+
 class EmotionalToneAnalyzer:
-    def __init__(self):
-        self.vader_analyzer = SentimentIntensityAnalyzer()
-        self.emotion_keywords = self._initialize_emotion_keywords()
-    
-    def _initialize_emotion_keywords(self) -> Dict[str, List[str]]:
-        return {
-            "anxiety": ["worried", "nervous", "anxious", "stressed", "overwhelmed", "panic", "fear"],
-            "frustration": ["frustrated", "annoyed", "irritated", "stuck", "blocked", "impossible"],
-            "excitement": ["excited", "thrilled", "enthusiastic", "motivated", "energized", "pumped"],
-            "confusion": ["confused", "unclear", "lost", "don't understand", "mixed up", "puzzled"],
-            "confidence": ["confident", "sure", "certain", "capable", "strong", "ready"],
-            "sadness": ["sad", "disappointed", "down", "discouraged", "hopeless", "defeated"],
-            "hope": ["hopeful", "optimistic", "positive", "better", "improving", "progress"],
-            "anger": ["angry", "mad", "furious", "upset", "outraged", "livid"]
-        }
+    def __init__(self, use_textblob: bool = False):
+        self.vader_analyzer = _VADER
+        # TextBlob roughly doubles the per-message cost for little gain over VADER
+        # on short conversational text, so it is only used when asked for
+        # (e.g. offline research runs)
+        self.textblob = None
+        if use_textblob:
+            from textblob import TextBlob
+            self.textblob = TextBlob
+        self.emotion_keywords = _EMOTION_KEYWORDS
+        self.keyword_emotions = _KEYWORD_EMOTIONS
+        self.emotion_pattern = _EMOTION_PATTERN
     
     def analyze_tone(self, text: str) -> EmotionalTone:
         """Analyze emotional tone of user input"""
+        lower = text.lower()  # shared by VADER and the keyword scan
+        return self._build_tone(text, lower, self._detect_emotions(lower))
+    
+    def _build_tone(self, text: str, lower: str, emotions: Dict[str, float]) -> EmotionalTone:
+        """Combine overall sentiment for text with its detected emotions"""
         # Use VADER for overall sentiment
-        vader_scores = self.vader_analyzer.polarity_scores(text.lower())
+        vader_scores = self.vader_analyzer.polarity_scores(lower)
         
-        # Use TextBlob for additional sentiment analysis
-        blob = TextBlob(text)
-        textblob_sentiment = blob.sentiment.polarity
-        
-        # Combine both scores
-        combined_sentiment = (vader_scores['compound'] + textblob_sentiment) / 2
+        combined_sentiment = vader_scores['compound']
+        if self.textblob is not None:
+            # Average in TextBlob's polarity when enabled
+            combined_sentiment = (combined_sentiment + self.textblob(text).sentiment.polarity) / 2
         
         # Determine sentiment category
         if combined_sentiment >= 0.1:
@@ -58,9 +120,6 @@ class EmotionalToneAnalyzer:
         else:
             sentiment = "neutral"
         
-        # Detect specific emotions
-        emotions = self._detect_emotions(text.lower())
-        
         # Calculate confidence based on intensity
         confidence = abs(combined_sentiment)
         
@@ -73,14 +132,17 @@ class EmotionalToneAnalyzer:
     
     def _detect_emotions(self, text: str) -> Dict[str, float]:
         """Detect specific emotions in text"""
-        emotions = {}
-        text_words = text.split()
+        return self._score_emotions(set(match.group(1) for match in self.emotion_pattern.finditer(text)))
+    
+    def _score_emotions(self, found_keywords) -> Dict[str, float]:
+        """Score each emotion by the share of its keywords that were found"""
+        emotion_scores = dict.fromkeys(self.emotion_keywords, 0)
+        for keyword in found_keywords:
+            emotion_scores[self.keyword_emotions[keyword]] += 1
         
+        emotions = {}
         for emotion, keywords in self.emotion_keywords.items():
-            emotion_score = 0
-            for keyword in keywords:
-                if keyword in text:
-                    emotion_score += 1
+            emotion_score = emotion_scores[emotion]
             
             # Normalize score
             emotions[emotion] = min(emotion_score / len(keywords), 1.0)
@@ -88,39 +150,101 @@ class EmotionalToneAnalyzer:
         return emotions
 
 class PersonalizationEngine:
-    def __init__(self):
-        self.user_profiles = {}
-        self.response_templates = self._initialize_response_templates()
-    
-    def _initialize_response_templates(self) -> Dict[str, Dict[str, str]]:
-        return {
-            "supportive": {
-                "high_anxiety": "I can sense this feels overwhelming right now. Let's take this one step at a time.",
-                "frustration": "It sounds like this has been really challenging for you. Your frustration is completely understandable.",
-                "low_confidence": "I hear some uncertainty in what you're sharing. What would help you feel more confident about this?",
-                "excitement": "I can feel your energy and enthusiasm! This excitement can be a powerful resource.",
-                "default": ""  # Empty to avoid interference with OpenAI responses
-            },
-            "challenging": {
-                "high_anxiety": "What would happen if you approached this with curiosity rather than worry?",
-                "frustration": "What assumptions might be contributing to this frustration?",
-                "low_confidence": "What evidence do you have that contradicts this doubt?",
-                "excitement": "How can you channel this excitement into focused action?",
-                "default": ""  # Empty to avoid interference with OpenAI responses
-            },
-            "direct": {
-                "high_anxiety": "Let's focus on what you can control right now.",
-                "frustration": "What specific action will move you forward?",
-                "low_confidence": "What's the smallest step you could take today?",
-                "excitement": "What's your next concrete step?",
-                "default": ""  # Empty to avoid interference with OpenAI responses
-            }
-        }
+    # Only the most recent sessions feed style adaptation; older ones are dropped
+    MAX_PROFILE_HISTORY = 50
+    
+    # Map emotions to template keys
+    _EMOTION_MAPPING = {
+        "anxiety": "high_anxiety",
+        "frustration": "frustration",
+        "confidence": "default",
+        "sadness": "low_confidence",
+        "excitement": "excitement",
+        "confusion": "low_confidence",
+        "hope": "default",
+        "anger": "frustration"
+    }
+    
+    _UPSERT_PROFILE = '''
+        INSERT INTO user_profiles
+        (user_id, communication_style, preferred_pace, emotional_sensitivity, learning_style, session_history)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT(user_id) DO UPDATE SET
+            communication_style = excluded.communication_style,
+            preferred_pace = excluded.preferred_pace,
+            emotional_sensitivity = excluded.emotional_sensitivity,
+            learning_style = excluded.learning_style,
+            session_history = excluded.session_history
+    '''
+    
+    def __init__(self, db_path: str = 'coaching_sessions.db', cache_size: int = 2048):
+        # Profiles live in SQLite; only recently used ones are kept in memory
+        self.user_profiles: "OrderedDict[str, UserProfile]" = OrderedDict()
+        self.cache_size = cache_size
+        self._cache_lock = threading.Lock()
+        self.response_templates = _RESPONSE_TEMPLATES
+        self._templates = _TEMPLATE_TABLE
+        
+        # Connections are opened lazily, one per thread and process, so none is
+        # shared across threads or inherited through a gunicorn fork. Each keeps
+        # sqlite3's statement cache, so the SELECT/UPSERT are prepared once.
+        self.db_path = db_path
+        self._local = threading.local()
+        self._connections: List[tuple] = []  # (pid, connection), closed by close()
+        conn = sqlite3.connect(db_path)
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS user_profiles (
+                user_id TEXT PRIMARY KEY,
+                communication_style TEXT,
+                preferred_pace TEXT,
+                emotional_sensitivity TEXT,
+                learning_style TEXT,
+                session_history TEXT
+            )
+        ''')
+        conn.commit()
+        conn.close()
+        
+        # Profile writes never run on the request thread: saves queue a row and
+        # a single background writer upserts every queued row in one batch
+        self._pending_rows: Dict[str, tuple] = {}
+        self._pending_lock = threading.Lock()
+        self._flush_scheduled = False
+        self._writer = None
+        self._writer_pid = None
+        atexit.register(self.close)
+    
+    def _connection(self) -> sqlite3.Connection:
+        """This thread's connection, reopened after a fork"""
+        pid = os.getpid()
+        if getattr(self._local, 'pid', None) != pid:
+            # Only its own thread uses it; check_same_thread is off so close() can shut it
+            self._local.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._local.pid = pid
+            with self._pending_lock:
+                self._connections.append((pid, self._local.conn))
+        return self._local.conn
+    
+    def close(self):
+        """Write queued profiles and close this process's connections (run at exit)"""
+        self.flush_profiles()
+        pid = os.getpid()
+        with self._pending_lock:
+            connections = [conn for owner, conn in self._connections if owner == pid]
+            self._connections = []
+        for conn in connections:
+            conn.close()
     
     def get_user_profile(self, user_id: str) -> UserProfile:
         """Get or create user profile"""
-        if user_id not in self.user_profiles:
-            self.user_profiles[user_id] = UserProfile(
+        with self._cache_lock:
+            return self._get_profile_locked(user_id)
+    
+    def _get_profile_locked(self, user_id: str) -> UserProfile:
+        """get_user_profile for a caller already holding _cache_lock"""
+        profile = self.user_profiles.get(user_id)
+        if profile is None:
+            profile = self._load_profile(user_id) or UserProfile(
                 user_id=user_id,
                 communication_style="supportive",  # default
                 preferred_pace="moderate",
@@ -128,7 +252,83 @@ class PersonalizationEngine:
                 learning_style="reading",
                 session_history=[]
             )
-        return self.user_profiles[user_id]
+            self._cache_profile(profile)
+        else:
+            self.user_profiles.move_to_end(user_id)
+        return profile
+    
+    def _cache_profile(self, profile: UserProfile):
+        """Insert or refresh a profile in the bounded cache; caller holds _cache_lock"""
+        self.user_profiles[profile.user_id] = profile
+        self.user_profiles.move_to_end(profile.user_id)
+        if len(self.user_profiles) > self.cache_size:
+            self.user_profiles.popitem(last=False)
+    
+    def _load_profile(self, user_id: str) -> Optional[UserProfile]:
+        """Read a stored profile, if the user has one; a queued write wins over the database"""
+        with self._pending_lock:
+            row = self._pending_rows.get(user_id)
+        if row is None:
+            row = self._connection().execute(
+                "SELECT user_id, communication_style, preferred_pace, emotional_sensitivity, learning_style, session_history "
+                "FROM user_profiles WHERE user_id = ?",
+                (user_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return UserProfile(
+            user_id=user_id,
+            communication_style=row[1],
+            preferred_pace=row[2],
+            emotional_sensitivity=row[3],
+            learning_style=row[4],
+            session_history=json.loads(row[5]) if row[5] else []
+        )
+    
+    def _save_profile(self, profile: UserProfile):
+        """Queue a profile for the background writer; caller holds _cache_lock"""
+        row = (
+            profile.user_id,
+            profile.communication_style,
+            profile.preferred_pace,
+            profile.emotional_sensitivity,
+            profile.learning_style,
+            json.dumps(profile.session_history)
+        )
+        with self._pending_lock:
+            self._pending_rows[profile.user_id] = row
+            if self._writer_pid != os.getpid():
+                # Created lazily so the thread belongs to this process, not the gunicorn master
+                self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='profile-db')
+                self._writer_pid = os.getpid()
+                self._flush_scheduled = False
+            if self._flush_scheduled:
+                return  # the queued flush will pick this row up
+            self._flush_scheduled = True
+            writer = self._writer
+        writer.submit(self.flush_profiles)
+    
+    def flush_profiles(self):
+        """Upsert every queued profile in one transaction"""
+        with self._pending_lock:
+            batch = dict(self._pending_rows)
+            self._flush_scheduled = False
+        if not batch:
+            return
+        conn = self._connection()
+        try:
+            conn.executemany(self._UPSERT_PROFILE, batch.values())
+            conn.commit()
+        except sqlite3.Error:
+            # Rows stay queued, so the next save retries them
+            logger.exception("Failed to write %d user profiles", len(batch))
+            conn.rollback()
+            return
+        with self._pending_lock:
+            # Rows stay readable from the queue until committed; keep any saved again meanwhile
+            for user_id, row in batch.items():
+                if self._pending_rows.get(user_id) is row:
+                    del self._pending_rows[user_id]
     
     def personalize_response(self, base_response: Dict[str, Any], 
                            emotional_tone: EmotionalTone, 
@@ -143,10 +343,10 @@ class PersonalizationEngine:
         template_key = self._select_template_key(emotional_tone, primary_emotion)
         
         # Get personalized message
-        personalized_message = self.response_templates[profile.communication_style].get(
-            template_key, 
-            self.response_templates[profile.communication_style]["default"]
-        )
+        style = profile.communication_style
+        personalized_message = self._templates.get((style, template_key))
+        if personalized_message is None:
+            personalized_message = self._templates[(style, "default")]
         
         # Modify base response
         personalized_response = {
@@ -160,37 +360,26 @@ class PersonalizationEngine:
     
     def _get_primary_emotion(self, emotional_tone: EmotionalTone) -> str:
         """Identify the primary emotion from the analysis"""
-        if not emotional_tone.emotions:
+        emotions = emotional_tone.emotions
+        if not emotions:
             return "neutral"
         
-        # Find emotion with highest score
-        primary_emotion = max(emotional_tone.emotions.items(), key=lambda x: x[1])
+        # Find emotion with highest score (dict.get is a C-level key, no lambda per item)
+        primary_emotion = max(emotions, key=emotions.get)
         
         # Only return if score is significant
-        if primary_emotion[1] > 0.3:
-            return primary_emotion[0]
+        if emotions[primary_emotion] > 0.3:
+            return primary_emotion
         
         return "neutral"
     
     def _select_template_key(self, emotional_tone: EmotionalTone, primary_emotion: str) -> str:
         """Select appropriate template key based on emotional analysis"""
-        # Map emotions to template keys
-        emotion_mapping = {
-            "anxiety": "high_anxiety",
-            "frustration": "frustration",
-            "confidence": "default",
-            "sadness": "low_confidence",
-            "excitement": "excitement",
-            "confusion": "low_confidence",
-            "hope": "default",
-            "anger": "frustration"
-        }
-        
         # Handle low confidence based on overall sentiment
         if emotional_tone.sentiment == "negative" and emotional_tone.confidence > 0.5:
             return "low_confidence"
         
-        return emotion_mapping.get(primary_emotion, "default")
+        return self._EMOTION_MAPPING.get(primary_emotion, "default")
     
     def _generate_adaptation_notes(self, emotional_tone: EmotionalTone, 
                                  profile: UserProfile) -> List[str]:
@@ -210,22 +399,27 @@ class PersonalizationEngine:
     
     def update_user_profile(self, user_id: str, session_data: Dict[str, Any]):
         """Update user profile based on session data"""
-        profile = self.get_user_profile(user_id)
-        
-        # Add session to history
-        profile.session_history.append({
-            "timestamp": session_data.get("timestamp"),
-            "topic": session_data.get("topic"),
-            "emotional_patterns": session_data.get("emotional_patterns", []),
-            "preferred_interactions": session_data.get("preferred_interactions", [])
-        })
-        
-        # Adapt communication style based on patterns
-        if len(profile.session_history) >= 3:
-            self._adapt_communication_style(profile)
+        with self._cache_lock:
+            profile = self._get_profile_locked(user_id)
+            
+            # Add session to history
+            profile.session_history.append({
+                "timestamp": session_data.get("timestamp"),
+                "topic": session_data.get("topic"),
+                "emotional_patterns": session_data.get("emotional_patterns", []),
+                "preferred_interactions": session_data.get("preferred_interactions", [])
+            })
+            
+            del profile.session_history[:-self.MAX_PROFILE_HISTORY]
+            
+            # Adapt communication style based on patterns
+            if len(profile.session_history) >= 3:
+                self._adapt_communication_style(profile)
+            
+            self._save_profile(profile)
     
     def _adapt_communication_style(self, profile: UserProfile):
-        """Adapt communication style based on user patterns"""
+        """Adapt communication style based on user patterns; caller holds _cache_lock"""
         recent_sessions = profile.session_history[-3:]
         
         # Analyze patterns in recent sessions
@@ -241,7 +435,4 @@ class PersonalizationEngine:
         if high_sensitivity_count >= 2:
             profile.emotional_sensitivity = "high"
             if profile.communication_style == "challenging":
-                profile.communication_style = "supportive"
-        
-        # Store updated profile (in production, save to database)
-        self.user_profiles[profile.user_id] = profile 
\ No newline at end of file
+                profile.communication_style = "supportive"
\ No newline at end of file
@@ -5,48 +5,53 @@ This module provides sophisticated AI coaching responses using OpenAI's GPT mode
 while maintaining ICF (International Coaching Federation) competency standards.
 """
 
-import openai
 import os
 import sys
-from typing import Dict, List, Any, Optional
-from dataclasses import dataclass
+import threading
+import time
+from types import MappingProxyType
+from typing import Dict, List, Any, Mapping, Optional, Sequence, Tuple
+from dataclasses import dataclass, field
 from datetime import datetime
 import json
+import logging
+import random
+import re
+from collections import deque
+from itertools import chain, product
+from functools import lru_cache
 
 # Add current directory to Python path to ensure imports work
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+logger = logging.getLogger(__name__)
+
+
+try:
+    from openai import OpenAI
+except ImportError:
+    OpenAI = None
+
 try:
     from intelligent_nlp import IntelligentContextAnalyzer, UserContext
     INTELLIGENT_NLP_AVAILABLE = True
-    print("✅ INTELLIGENT NLP: Successfully imported")
+    logger.debug("Intelligent NLP analyzer imported")
 except ImportError as e:
-    print(f"❌ Import error: {e}")
-    print("🔧 Creating enhanced fallback context analyzer...")
+    logger.warning("Intelligent NLP unavailable, using the fallback context analyzer: %s", e)
     INTELLIGENT_NLP_AVAILABLE = False
     
     # Enhanced fallback implementation with basic intelligence
-    @dataclass
+    @dataclass(slots=True)
     class UserContext:
         corrected_text: str = ""
-        primary_emotions: List[str] = None
-        challenges_mentioned: List[str] = None
-        strengths_mentioned: List[str] = None
+        primary_emotions: List[str] = field(default_factory=list)
+        challenges_mentioned: List[str] = field(default_factory=list)
+        strengths_mentioned: List[str] = field(default_factory=list)
         intent: str = "exploring"
         confidence_level: str = "medium"
         readiness_for_action: str = "exploring"
-        key_themes: List[str] = None
+        key_themes: List[str] = field(default_factory=list)
         sentiment_score: float = 0.0
-        
-        def __post_init__(self):
-            if self.primary_emotions is None:
-                self.primary_emotions = []
-            if self.challenges_mentioned is None:
-                self.challenges_mentioned = []
-            if self.strengths_mentioned is None:
-                self.strengths_mentioned = []
-            if self.key_themes is None:
-                self.key_themes = []
     
     class IntelligentContextAnalyzer:
         def __init__(self):
@@ -57,25 +62,27 @@ except ImportError as e:
                 'bigest': 'biggest',
                 'chalenge': 'challenge'
             }
+            self._corrections_pattern = re.compile(
+                r"\b(" + "|".join(map(re.escape, sorted(self.corrections, key=len, reverse=True))) + r")\b"
+            )
+            self._used_contextual_responses = RecentChoices(5)
         
         def analyze_context(self, user_input: str, conversation_history=None):
             # Basic spell correction
-            corrected = user_input
-            for wrong, right in self.corrections.items():
-                corrected = corrected.replace(wrong, right)
+            corrected = self._corrections_pattern.sub(lambda m: self.corrections[m.group(0)], user_input)
             
             # Basic pattern detection
             text_lower = corrected.lower()
             emotions = []
             challenges = []
             
-            if any(word in text_lower for word in ['scared', 'afraid', 'anxious', 'worried']):
+            if _contains_any(text_lower, ('scared', 'afraid', 'anxious', 'worried')):
                 emotions.append('anxiety')
-            if any(word in text_lower for word in ['doubt', 'unsure', 'uncertain']):
+            if _contains_any(text_lower, ('doubt', 'unsure', 'uncertain')):
                 emotions.append('doubt')
-            if any(word in text_lower for word in ['procrastination', 'procrastinate', 'delay']):
+            if _contains_any(text_lower, ('procrastination', 'procrastinate', 'delay')):
                 challenges.append('procrastination')
-            if any(word in text_lower for word in ['new task', 'unfamiliar', 'new']):
+            if _contains_any(text_lower, ('new task', 'unfamiliar', 'new')):
                 challenges.append('new_tasks')
                 
             return UserContext(
@@ -87,119 +94,47 @@ except ImportError as e:
             )
         
         def generate_contextual_response(self, context, depth):
-            # Initialize response tracking if not exists
-            if not hasattr(self, '_used_contextual_responses'):
-                self._used_contextual_responses = set()
-            
             # Progressive conversation building based on depth and content
             text_lower = context.corrected_text.lower()
             
-            # Build response options for each scenario
-            response_options = []
-            
             # First response (depth 1-2) - Acknowledge and explore
             if depth <= 2:
                 if 'procrastination' in context.challenges_mentioned:
                     if 'biggest' in text_lower:
-                        response_options = [
-                            "Procrastination being your biggest challenge tells me this is really impacting your effectiveness. What specific situations make it feel most overwhelming?",
-                            "I can hear that procrastination feels like a major barrier for you. What happens in the moments just before you decide to postpone a task?",
-                            "That sounds like procrastination is creating significant stress in your work life. Can you walk me through what a typical procrastination cycle looks like for you?"
-                        ]
+                        response_options = _FALLBACK_CONTEXTUAL_RESPONSES["procrastination_biggest"]
                     else:
-                        response_options = [
-                            "I hear that procrastination is creating real challenges for you. Can you help me understand what procrastination looks like in your day-to-day work?",
-                            "Procrastination can feel overwhelming when it becomes a pattern. What types of tasks do you find yourself putting off most often?",
-                            "Thank you for sharing that. What do you think triggers your procrastination response most strongly?"
-                        ]
-                elif any(word in text_lower for word in ['stressed', 'stress', 'confidence', 'confident']):
-                    response_options = [
-                        "I can hear the stress and confidence challenges you're describing. When you're facing a challenging task, what thoughts typically go through your mind first?",
-                        "It sounds like stress and confidence are really interconnected for you. What happens internally when you encounter something that feels difficult?",
-                        "I notice you mentioned both stress and confidence - these often feed into each other. What does that experience feel like for you?"
-                    ]
+                        response_options = _FALLBACK_CONTEXTUAL_RESPONSES["procrastination"]
+                elif _contains_any(text_lower, ('stressed', 'stress', 'confidence', 'confident')):
+                    response_options = _FALLBACK_CONTEXTUAL_RESPONSES["stress_confidence"]
                 else:
-                    response_options = [
-                        "Thank you for sharing that. What aspect of this situation feels most urgent for you right now?",
-                        "I appreciate you opening up about this. What's the most important thing you'd like me to understand about your experience?",
-                        "That gives me a good sense of what you're dealing with. What feels like the biggest challenge in this situation?"
-                    ]
+                    response_options = _FALLBACK_CONTEXTUAL_RESPONSES["opening"]
             
             # Second response (depth 3-4) - Dig deeper into patterns and impact
             elif depth <= 4:
-                if any(word in text_lower for word in ['manager', 'team', 'performance', 'appraisal', 'ratings']):
-                    response_options = [
-                        "I can hear how this is affecting your professional relationships and reputation. That must feel quite heavy. What's the most difficult part about how others are perceiving your work right now?",
-                        "It sounds like this is impacting how you're seen at work, which can feel really vulnerable. What concerns you most about your professional reputation right now?",
-                        "The workplace dynamics you're describing sound challenging. How do you think this pattern is affecting your relationships with colleagues and supervisors?"
-                    ]
-                elif any(word in text_lower for word in ['confidence', 'brand', 'competent', 'leader']):
-                    response_options = [
-                        "It sounds like this is touching something deeper about your professional identity and how you see yourself as a leader. What would it mean to you to rebuild that confidence?",
-                        "I hear how this is affecting your sense of leadership and professional identity. What aspects of your leadership style do you feel have been impacted most?",
-                        "Your professional brand and confidence seem really important to you. What version of yourself would you like to reconnect with?",
-                        "It seems like your identity as a competent professional is being challenged here. What qualities do you want to reclaim or strengthen?"
-                    ]
-                elif any(word in text_lower for word in ['challenging', 'tasks', 'unable', 'stressed']):
-                    response_options = [
-                        "I'm hearing a pattern where challenging tasks trigger stress and avoidance. What do you think is driving that initial stress response when something feels difficult?",
-                        "There seems to be a cycle between challenging work and stress for you. When did you first notice this pattern developing?",
-                        "It sounds like difficult tasks create a stress response that makes them even harder to tackle. What do you think breaks that cycle for you when it does get broken?"
-                    ]
+                if _contains_any(text_lower, ('manager', 'team', 'performance', 'appraisal', 'ratings')):
+                    response_options = _FALLBACK_CONTEXTUAL_RESPONSES["workplace"]
+                elif _contains_any(text_lower, ('confidence', 'brand', 'competent', 'leader')):
+                    response_options = _FALLBACK_CONTEXTUAL_RESPONSES["identity"]
+                elif _contains_any(text_lower, ('challenging', 'tasks', 'unable', 'stressed')):
+                    response_options = _FALLBACK_CONTEXTUAL_RESPONSES["stress_cycle"]
                 else:
-                    response_options = [
-                        "There's clearly a lot beneath the surface here. What feels like the most important piece for us to understand better?",
-                        "I can sense there are multiple layers to what you're experiencing. What aspect would you like to explore more deeply?",
-                        "It seems like there are several interconnected challenges here. Which one feels most central to address?"
-                    ]
+                    response_options = _FALLBACK_CONTEXTUAL_RESPONSES["deeper"]
             
             # Later responses (depth 5+) - Move toward insight and solutions
             else:
-                if any(word in text_lower for word in ['losing', 'going down', 'bad light', 'hesitant']):
-                    response_options = [
-                        "I can hear how painful this professional decline feels. You're clearly someone who cares deeply about excellence. What strengths do you have that you could lean on to start turning this around?",
-                        "The decline you're describing sounds really difficult to experience. What resources or past successes could you draw on to start rebuilding?",
-                        "It takes courage to acknowledge when things feel like they're going downhill. What small step could help you start moving in a different direction?"
-                    ]
-                elif any(word in text_lower for word in ['brand value', 'competent leader', 'reputation']):
-                    response_options = [
-                        "Your awareness of how this impacts your leadership brand shows real insight. Given everything you've shared, what feels like the most important shift you could make to start rebuilding that reputation?",
-                        "I can see how much your professional reputation means to you. What would be the first sign that you're moving back toward the leader you want to be?",
-                        "Your leadership brand is clearly important to your identity. What would it look like to start making small changes that align with who you want to be professionally?"
-                    ]
+                if _contains_any(text_lower, ('losing', 'going down', 'bad light', 'hesitant')):
+                    response_options = _FALLBACK_CONTEXTUAL_RESPONSES["decline"]
+                elif _contains_any(text_lower, ('brand value', 'competent leader', 'reputation')):
+                    response_options = _FALLBACK_CONTEXTUAL_RESPONSES["reputation"]
                 elif 'understand' in text_lower:
-                    response_options = [
-                        "I can see you're looking for deeper understanding of this pattern. Based on everything you've described - the stress, the avoidance, the impact on your reputation - what do you think might be the root cause driving all of this?",
-                        "Your desire to understand this pattern shows real self-awareness. What connections are you starting to make about what might be underneath all of this?",
-                        "It sounds like you're ready to look deeper at what's driving these challenges. What insights are beginning to emerge for you?"
-                    ]
+                    response_options = _FALLBACK_CONTEXTUAL_RESPONSES["understanding"]
                 else:
-                    response_options = [
-                        "You've painted a clear picture of how this is affecting multiple areas of your professional life. What feels like the most important insight or shift you'd like to focus on moving forward?",
-                        "Given everything you've shared, what feels like the key breakthrough or change that could make the biggest difference?",
-                        "You've shown a lot of self-awareness in describing this situation. What action or insight feels most important to focus on next?"
-                    ]
-            
-            # Select an unused response
-            available_responses = [r for r in response_options if r not in self._used_contextual_responses]
-            
-            # If all responses have been used, clear history and use any
-            if not available_responses:
-                self._used_contextual_responses.clear()
-                available_responses = response_options
-            
-            # Select response (prefer first unused, but randomize if multiple available)
-            import random
-            chosen_response = random.choice(available_responses) if len(available_responses) > 1 else available_responses[0]
-            self._used_contextual_responses.add(chosen_response)
+                    response_options = _FALLBACK_CONTEXTUAL_RESPONSES["insight"]
             
-            # Keep only recent responses in memory (last 5)
-            if len(self._used_contextual_responses) > 5:
-                self._used_contextual_responses = set(list(self._used_contextual_responses)[-5:])
-            
-            return chosen_response
+            # Select an unused response (recent picks are skipped until all have been used)
+            return self._used_contextual_responses.choose(response_options)
 
-@dataclass
+@dataclass(slots=True)
 class CoachingContext:
     topic: str
     stage: str
@@ -208,140 +143,694 @@ class CoachingContext:
     icf_competency: str
     session_goals: List[str]
 
+@lru_cache(maxsize=None)
+def _phrase_pattern(phrases: Tuple[str, ...]) -> "re.Pattern":
+    """Compile phrases into one alternation, so a text is scanned once instead of once per phrase"""
+    return re.compile("|".join(map(re.escape, phrases)))
+
+def _contains_any(text: str, phrases: Tuple[str, ...]) -> bool:
+    """True when any of the phrases occurs in text (plain substring match)"""
+    return _phrase_pattern(phrases).search(text) is not None
+
+# Stage progression cues for _suggest_next_stage
+_INSIGHT_INDICATORS = _phrase_pattern((
+    "i notice", "i realize", "i see that", "i understand", "it's because",
+    "the pattern", "what drives this", "i think it's", "maybe it's",
+    "i'm starting to see", "now i understand", "it seems like", "i believe"
+))
+_ACTION_INDICATORS = _phrase_pattern((
+    "i want to", "i need to", "i should", "what should i do", "how do i",
+    "what's the next step", "i'm ready", "i want to change", "help me",
+    "what can i do", "i'd like to try", "how can i", "that's exactly why",
+    "yes", "absolutely", "let's do it", "i'm ready", "ready to create",
+    "action plan", "let's create", "ready for action", "move forward",
+    "take action", "next step", "what should i do"
+))
+_COMMITMENT_INDICATORS = _phrase_pattern((
+    "i will", "i'll try", "i commit", "i'm going to", "my goal is",
+    "i'll start", "i'll work on", "i'll practice", "i'll focus on",
+    "as a first step", "i want to not", "if i take", "my plan is",
+    "i'll implement", "i'll apply", "i'll begin", "starting this week",
+    "my action", "i plan to", "i intend to", "i want to pick up",
+    "stretch project", "try my hands", "i want to take on"
+))
+
+@dataclass(frozen=True)
+class TextFeatures:
+    """Keyword features of one user message, computed once and shared by every branch that routes on it"""
+    lowered: str
+    has_insight_indicator: bool
+    has_action_indicator: bool
+    has_commitment_indicator: bool
+    has_procrastination: bool
+    has_confidence: bool
+    has_new_task: bool
+
+# TextFeatures flag -> pattern that sets it
+_FEATURE_PATTERNS = (
+    ("has_insight_indicator", _INSIGHT_INDICATORS),
+    ("has_action_indicator", _ACTION_INDICATORS),
+    ("has_commitment_indicator", _COMMITMENT_INDICATORS),
+    ("has_procrastination", _phrase_pattern(("procrastination", "procrastinate"))),
+    ("has_confidence", _phrase_pattern(("confidence", "doubt"))),
+    ("has_new_task", _phrase_pattern(("new task", "unfamiliar")))
+)
+
+@lru_cache(maxsize=128)
+def extract_text_features(user_message: str) -> TextFeatures:
+    """Lowercase and classify a message in one place (cached per message)"""
+    lowered = user_message.lower()
+    return TextFeatures(
+        lowered=lowered,
+        **{name: pattern.search(lowered) is not None for name, pattern in _FEATURE_PATTERNS}
+    )
+
+class KeywordRouter:
+    """Routes a lowercased text to the first branch (in the given order) with a keyword in it.
+
+    All keywords share one lookahead alternation, listed in branch order, so a single
+    scan finds every branch that matches (substring matches, overlaps included).
+    """
+    
+    def __init__(self, branches: Sequence[Tuple[str, Sequence[str]]]):
+        self._rank: Dict[str, int] = {}
+        self._keyword_branch: Dict[str, str] = {}
+        for rank, (branch, keywords) in enumerate(branches):
+            self._rank[branch] = rank
+            for keyword in keywords:
+                self._keyword_branch.setdefault(keyword, branch)
+        self._pattern = re.compile("(?=(" + "|".join(map(re.escape, self._keyword_branch)) + "))")
+    
+    def match(self, text: str) -> Optional[str]:
+        branches = {self._keyword_branch[match.group(1)] for match in self._pattern.finditer(text)}
+        return min(branches, key=self._rank.__getitem__, default=None)
+
+class RecentChoices:
+    """Random picks from constant option tuples that skip the last few picks.
+
+    Used options are tracked as (id(options), index) in a bounded deque plus a
+    per-tuple bitmask, so no filtered list is built per pick. Options must be
+    long-lived tuples (the module-level tables) since they are keyed by id().
+    Picks come from rng, a private random.Random unless one is shared in.
+    """
+    
+    def __init__(self, limit: int, rng: Optional[random.Random] = None):
+        self._rng = rng if rng is not None else random.Random()
+        self._recent = deque(maxlen=limit)
+        self._masks: Dict[int, int] = {}
+    
+    def choose(self, options: Sequence[str]) -> str:
+        key = id(options)
+        full = (1 << len(options)) - 1
+        free = full & ~self._masks.get(key, 0)
+        if not free:
+            # Every option has been used recently - start over
+            self.clear()
+            free = full
+        
+        # Take the k-th free index straight from the mask (same draw as choice() over the free list)
+        for _ in range(self._rng.randrange(bin(free).count('1'))):
+            free &= free - 1  # drop the lowest free index
+        index = (free & -free).bit_length() - 1
+        if self._recent and len(self._recent) == self._recent.maxlen:
+            # The append below drops the oldest pick; make it available again
+            old_key, old_index = self._recent[0]
+            self._masks[old_key] &= ~(1 << old_index)
+        self._masks[key] = self._masks.get(key, 0) | (1 << index)
+        self._recent.append((key, index))
+        return options[index]
+    
+    def clear(self) -> None:
+        self._recent.clear()
+        self._masks.clear()
+
+GITHUB_MODELS_BASE_URL = "https://models.github.ai/inference"
+
+COMPLETION_PARAMS = {
+    "model": "openai/gpt-4o-mini",  # Using mini model for better availability
+    "max_tokens": 300,
+    "temperature": 0.7,
+    "presence_penalty": 0.1,
+    "frequency_penalty": 0.1
+}
+
+# Fail fast: bounded request time, and after repeated failures stop calling
+# GitHub Models for a cooldown instead of waiting on every turn
+API_TIMEOUT_SECONDS = 15.0
+BREAKER_FAILURE_THRESHOLD = 3
+BREAKER_COOLDOWN_SECONDS = 30.0
+
+# ICF competency guidance used in the system prompt (read-only, shared by all engines)
+_ICF_COMPETENCIES: Mapping[str, str] = MappingProxyType({
+    "establishing_trust_and_intimacy": "Create a safe, supportive, and confidential coaching environment. Show genuine care and concern.",
+    "active_listening": "Focus completely on what the client is saying. Listen for meaning, emotion, and what's not being said.",
+    "powerful_questioning": "Ask questions that reveal underlying assumptions, create greater clarity, and move the client forward.",
+    "creating_awareness": "Help the client identify patterns, gain insights, and see new perspectives.",
+    "designing_actions": "Partner with the client to create specific, measurable actions that move them toward their goals.",
+    "managing_progress_and_accountability": "Hold the client accountable and celebrate their progress."
+})
+
+# Stage-specific guidance used in the system prompt
+_STAGE_GUIDANCE: Mapping[str, str] = MappingProxyType({
+    "intake": "Focus on understanding what the client wants to work on. Create safety and establish the coaching relationship.",
+    "exploration": "Help the client explore the situation deeply. Listen for patterns, emotions, and underlying beliefs.",
+    "reflection": "Help the client gain insights and awareness. Point out patterns and help them see new perspectives.", 
+    "action_planning": "Partner with the client to create specific, actionable steps. Focus on commitment and accountability.",
+    "follow_up": "Review progress, celebrate successes, and adjust plans as needed."
+})
+
+# Follow-up questions for model responses, by stage
+_CONTEXTUAL_QUESTIONS = {
+    "exploration": (
+        "What else is important about this situation?",
+        "How does this impact other areas of your life?",
+        "What would need to change for this to improve?"
+    ),
+    "reflection": (
+        "What patterns do you notice here?",
+        "What insights are emerging for you?",
+        "How does this align with your values?"
+    ),
+    "action_planning": (
+        "What specific action feels most important right now?",
+        "What support do you need to make this happen?",
+        "How will you know you're successful?"
+    ),
+    "follow_up": (
+        "How has your action plan been working for you?",
+        "What progress have you made since our last conversation?",
+        "What adjustments do you need to make to your approach?",
+        "What additional support would be helpful moving forward?",
+        "How will you maintain momentum on this growth area?"
+    )
+}
+
+# Demo replies when a client returns for a follow-up session
+_FOLLOW_UP_WELCOME_RESPONSES = (
+    "I'm so glad to connect with you again! It's wonderful that you've taken steps toward your growth mindset goal. What has been your experience since we last talked?",
+    "Welcome back! I'm curious to hear how things have been going with developing that growth mindset approach to challenges. What have you noticed about yourself?",
+    "It's great to see you again! I'd love to hear about your journey with embracing challenges as growth opportunities. What's been happening for you?",
+    "Thank you for coming back to continue this important work. How has your relationship with new challenges evolved since our last session?",
+    "I'm excited to hear about your progress! What shifts have you noticed in how you approach difficult or unfamiliar tasks?"
+)
+
+# Demo follow-up question pool, by purpose
+_DEMO_QUESTION_BANK = {
+    # Exploration & Understanding
+    "exploration": (
+        "What beliefs about yourself might be contributing to this situation?",
+        "What thoughts go through your mind when facing these situations?",
+        "What physical sensations do you notice when this happens?",
+        "What stories do you tell yourself in these moments?",
+        "What would your best friend say about this situation?",
+        "What's underneath this challenge for you?",
+        "What does this situation remind you of from your past?",
+        "What are you learning about yourself through this?",
+        "What assumptions might you be making here?",
+        "What's the most surprising thing about this pattern?"
+    ),
+
+    # Patterns & Awareness
+    "patterns": (
+        "What patterns do you notice about when this happens most?",
+        "When you do feel confident and capable, what's different?",
+        "What circumstances tend to trigger this response?",
+        "How does this show up in other areas of your life?",
+        "What would need to be different for you to feel more confident?",
+        "What environments or situations bring out your best?",
+        "What's worked for you in similar situations before?",
+        "What would someone who knows you well say about your strengths?",
+        "How has this pattern served you in the past?",
+        "What's changed recently that might be affecting this?"
+    ),
+
+    # Resources & Strengths
+    "resources": (
+        "What resources or support systems do you currently have?",
+        "What skills do you already possess that could help here?",
+        "Who in your life believes in your capabilities?",
+        "What past successes can you draw strength from?",
+        "What would accessing your full potential look like?",
+        "What support would be most helpful right now?",
+        "What internal resources can you tap into?",
+        "What would encourage you to take the next step?",
+        "What would your wisest self advise you to do?",
+        "What energizes you most about making this change?"
+    ),
+
+    # Action & Implementation
+    "action": (
+        "What feels like the most natural first step for you?",
+        "What small experiment could you try this week?",
+        "What would make taking action feel easier?",
+        "What obstacles do you anticipate, and how might you address them?",
+        "What would accountability look like for you?",
+        "What would motivate you to follow through?",
+        "How could you break this down into smaller pieces?",
+        "What would you need to believe about yourself to move forward?",
+        "What would happen if you trusted yourself more?",
+        "What commitment are you ready to make to yourself?"
+    ),
+
+    # Success & Vision
+    "success": (
+        "What would it feel like to have overcome this challenge?",
+        "How would others notice the change in you?",
+        "What would become possible if you solved this?",
+        "What impact would this change have on your work/life?",
+        "What legacy do you want to create around this?",
+        "How will you celebrate when you make progress?",
+        "What would your future self thank you for doing now?",
+        "What excites you most about this potential change?",
+        "What would confidence look like in your daily life?",
+        "How would you know you're making real progress?"
+    ),
+
+    # Context-specific questions based on user content
+    "procrastination": (
+        "What typically happens right before you decide to postpone a task?",
+        "How long do tasks usually sit before you finally tackle them?",
+        "What's the difference between tasks you complete immediately vs. those you postpone?"
+    ),
+
+    "confidence": (
+        "When was the last time you felt truly confident in your abilities?",
+        "What would need to happen for you to trust yourself more with new challenges?",
+        "How do you typically build confidence when learning something new?"
+    ),
+
+    "new_tasks": (
+        "What makes a task feel 'manageable' vs. 'overwhelming' to you?",
+        "How do you usually approach learning something completely new?",
+        "What support would help you feel more prepared for unfamiliar work?"
+    )
+}
+
+# Used when the demo question pool is exhausted
+_DEMO_FALLBACK_QUESTIONS = (
+    "What insight feels most important right now?",
+    "What would you like to explore further?",
+    "What's calling for your attention in this situation?"
+)
+
+# Generic reply returned by _generate_fallback_response
+_API_FALLBACK_MESSAGE = (
+    "I appreciate you sharing that with me. This seems really important to you. "
+    "Can you help me understand what aspect of this situation you'd most like to explore?"
+)
+_API_FALLBACK_QUESTIONS = ("What feels most urgent about this?", "What would success look like?")
+
+# Demo question pool per conversation depth bucket (1-2, 3-4, 5+): every question of
+# the primary categories, then the first three of each secondary category
+_DEMO_DEPTH_QUESTIONS = tuple(
+    tuple(chain.from_iterable(_DEMO_QUESTION_BANK[category] for category in primary))
+    + tuple(chain.from_iterable(_DEMO_QUESTION_BANK[category][:3] for category in secondary))
+    for primary, secondary in (
+        (("exploration", "patterns"), ("resources",)),
+        (("patterns", "resources"), ("exploration", "action")),
+        (("action", "success"), ("resources", "patterns"))
+    )
+)
+
+# Every demo question with a small integer id, so the questions used in a conversation
+# fit in a single int bitmask
+_DEMO_ALL_QUESTIONS = tuple(dict.fromkeys(chain(
+    chain.from_iterable(_DEMO_QUESTION_BANK.values()), _DEMO_FALLBACK_QUESTIONS
+)))
+_DEMO_QUESTION_IDS = {question: qid for qid, question in enumerate(_DEMO_ALL_QUESTIONS)}
+_DEMO_FALLBACK_QUESTION_IDS = tuple(_DEMO_QUESTION_IDS[question] for question in _DEMO_FALLBACK_QUESTIONS)
+
+# Random candidates drawn per turn before falling back to filtering the whole pool
+DEMO_QUESTION_DRAWS = 6
+
+# Ids of every candidate list _get_varied_demo_questions can build, keyed by (depth bucket,
+# has_procrastination, has_confidence, has_new_task): context-specific categories first
+_DEMO_CANDIDATE_QUESTIONS = {
+    (bucket, procrastination, confidence, new_task): tuple(dict.fromkeys(
+        _DEMO_QUESTION_IDS[question] for question in chain(
+            _DEMO_QUESTION_BANK["procrastination"] if procrastination else (),
+            _DEMO_QUESTION_BANK["confidence"] if confidence else (),
+            _DEMO_QUESTION_BANK["new_tasks"] if new_task else (),
+            depth_questions
+        )
+    ))
+    for bucket, depth_questions in enumerate(_DEMO_DEPTH_QUESTIONS)
+    for procrastination, confidence, new_task in product((False, True), repeat=3)
+}
+
+# Fallback analyzer replies, by conversation depth and theme
+_FALLBACK_CONTEXTUAL_RESPONSES = {
+    "procrastination_biggest": (
+        "Procrastination being your biggest challenge tells me this is really impacting your effectiveness. What specific situations make it feel most overwhelming?",
+        "I can hear that procrastination feels like a major barrier for you. What happens in the moments just before you decide to postpone a task?",
+        "That sounds like procrastination is creating significant stress in your work life. Can you walk me through what a typical procrastination cycle looks like for you?"
+    ),
+    "procrastination": (
+        "I hear that procrastination is creating real challenges for you. Can you help me understand what procrastination looks like in your day-to-day work?",
+        "Procrastination can feel overwhelming when it becomes a pattern. What types of tasks do you find yourself putting off most often?",
+        "Thank you for sharing that. What do you think triggers your procrastination response most strongly?"
+    ),
+    "stress_confidence": (
+        "I can hear the stress and confidence challenges you're describing. When you're facing a challenging task, what thoughts typically go through your mind first?",
+        "It sounds like stress and confidence are really interconnected for you. What happens internally when you encounter something that feels difficult?",
+        "I notice you mentioned both stress and confidence - these often feed into each other. What does that experience feel like for you?"
+    ),
+    "opening": (
+        "Thank you for sharing that. What aspect of this situation feels most urgent for you right now?",
+        "I appreciate you opening up about this. What's the most important thing you'd like me to understand about your experience?",
+        "That gives me a good sense of what you're dealing with. What feels like the biggest challenge in this situation?"
+    ),
+    "workplace": (
+        "I can hear how this is affecting your professional relationships and reputation. That must feel quite heavy. What's the most difficult part about how others are perceiving your work right now?",
+        "It sounds like this is impacting how you're seen at work, which can feel really vulnerable. What concerns you most about your professional reputation right now?",
+        "The workplace dynamics you're describing sound challenging. How do you think this pattern is affecting your relationships with colleagues and supervisors?"
+    ),
+    "identity": (
+        "It sounds like this is touching something deeper about your professional identity and how you see yourself as a leader. What would it mean to you to rebuild that confidence?",
+        "I hear how this is affecting your sense of leadership and professional identity. What aspects of your leadership style do you feel have been impacted most?",
+        "Your professional brand and confidence seem really important to you. What version of yourself would you like to reconnect with?",
+        "It seems like your identity as a competent professional is being challenged here. What qualities do you want to reclaim or strengthen?"
+    ),
+    "stress_cycle": (
+        "I'm hearing a pattern where challenging tasks trigger stress and avoidance. What do you think is driving that initial stress response when something feels difficult?",
+        "There seems to be a cycle between challenging work and stress for you. When did you first notice this pattern developing?",
+        "It sounds like difficult tasks create a stress response that makes them even harder to tackle. What do you think breaks that cycle for you when it does get broken?"
+    ),
+    "deeper": (
+        "There's clearly a lot beneath the surface here. What feels like the most important piece for us to understand better?",
+        "I can sense there are multiple layers to what you're experiencing. What aspect would you like to explore more deeply?",
+        "It seems like there are several interconnected challenges here. Which one feels most central to address?"
+    ),
+    "decline": (
+        "I can hear how painful this professional decline feels. You're clearly someone who cares deeply about excellence. What strengths do you have that you could lean on to start turning this around?",
+        "The decline you're describing sounds really difficult to experience. What resources or past successes could you draw on to start rebuilding?",
+        "It takes courage to acknowledge when things feel like they're going downhill. What small step could help you start moving in a different direction?"
+    ),
+    "reputation": (
+        "Your awareness of how this impacts your leadership brand shows real insight. Given everything you've shared, what feels like the most important shift you could make to start rebuilding that reputation?",
+        "I can see how much your professional reputation means to you. What would be the first sign that you're moving back toward the leader you want to be?",
+        "Your leadership brand is clearly important to your identity. What would it look like to start making small changes that align with who you want to be professionally?"
+    ),
+    "understanding": (
+        "I can see you're looking for deeper understanding of this pattern. Based on everything you've described - the stress, the avoidance, the impact on your reputation - what do you think might be the root cause driving all of this?",
+        "Your desire to understand this pattern shows real self-awareness. What connections are you starting to make about what might be underneath all of this?",
+        "It sounds like you're ready to look deeper at what's driving these challenges. What insights are beginning to emerge for you?"
+    ),
+    "insight": (
+        "You've painted a clear picture of how this is affecting multiple areas of your professional life. What feels like the most important insight or shift you'd like to focus on moving forward?",
+        "Given everything you've shared, what feels like the key breakthrough or change that could make the biggest difference?",
+        "You've shown a lot of self-awareness in describing this situation. What action or insight feels most important to focus on next?"
+    )
+}
+
+# Demo replies during action planning
+_ACTION_PLANNING_RESPONSES = {
+    "ready": (
+        "That's wonderful to hear your readiness! What specific action feels most important to focus on first?",
+        "I can sense your commitment to moving forward. What would be the most meaningful first step you could take?",
+        "Your willingness to take action is inspiring. What concrete step could you commit to this week?",
+        "I appreciate your readiness to create change. What action would have the biggest impact on your situation?"
+    ),
+    "break_down": (
+        "Breaking things down into smaller steps is such a powerful strategy! How might you structure these smaller tasks?",
+        "That approach of breaking complex tasks down shows real insight. What would be your first small step?",
+        "I love how you're thinking about manageable pieces. What's the smallest step you could take to get started?",
+        "Your plan to break things down is excellent. How will you organize these smaller tasks to maintain momentum?"
+    ),
+    "fear": (
+        "Moving through fear takes real courage. What support would help you take that first brave step?",
+        "I hear your determination to overcome these challenges. What would make the first action feel more manageable?",
+        "Your awareness of fear is the first step to moving through it. What would help you feel more prepared?",
+        "It takes strength to face fears head-on. What resources could you tap into to support this change?"
+    ),
+    "stretch": (
+        "A stretch project sounds like a perfect way to put your new approach into practice! What type of project are you considering?",
+        "I love that you want to challenge yourself with something new. What would make this stretch project feel both challenging and achievable?",
+        "Taking on a stretch project shows real growth mindset. How will you approach this differently than you might have before?",
+        "What an excellent way to practice your new skills! What support would help you succeed with this stretch project?"
+    ),
+    "general": (
+        "Let's focus on turning your insights into action. What specific change would make the biggest difference?",
+        "I can see you're ready to move forward. What concrete step feels most important to commit to?",
+        "Your self-awareness gives you a strong foundation for action. What would you like to focus on implementing?",
+        "What action could you take that would start to shift the patterns we've been discussing?",
+        "How can we translate your insights into specific, actionable steps?",
+        "What would be the most meaningful action you could commit to right now?"
+    )
+}
+
+# Keyword routing onto the action planning / follow-up reply tables, in precedence order
+_ACTION_PLANNING_ROUTER = KeywordRouter((
+    ("ready", ("ready", "action plan", "want to", "commit", "yes")),
+    ("break_down", ("break down", "smaller", "steps", "plan")),
+    ("fear", ("fear", "scared", "overcome", "challenge")),
+    ("stretch", ("stretch", "project", "try", "hands on"))
+))
+_FOLLOW_UP_ROUTER = KeywordRouter((
+    ("progress", ("progress", "better", "working", "success")),
+    ("struggle", ("struggle", "difficult", "challenge", "hard")),
+    ("momentum", ("maintain", "continue", "momentum", "keep going"))
+))
+
+# Demo replies during follow-up
+_FOLLOW_UP_RESPONSES = {
+    "progress": (
+        "That's fantastic progress! What has been the most surprising part of your journey so far?",
+        "I'm thrilled to hear about your success! What's been the key to making this progress?",
+        "Your progress is inspiring! What difference are you noticing in how you approach challenges now?",
+        "It's wonderful to see your hard work paying off. What would you like to build on next?"
+    ),
+    "struggle": (
+        "Thank you for being honest about the challenges. What support would be most helpful right now?",
+        "I appreciate you sharing what's been difficult. What adjustments might help you move forward?",
+        "It takes courage to acknowledge when things are tough. What have you learned about yourself through these challenges?",
+        "Struggles are part of the growth process. What strengths can you draw on to navigate this?"
+    ),
+    "momentum": (
+        "Maintaining momentum is so important! What systems are helping you stay consistent?",
+        "I love your focus on sustainability. What's working best to keep you motivated?",
+        "Your commitment to continuous progress is admirable. How are you celebrating your wins along the way?",
+        "Consistency is key to lasting change. What habits are you building to support your growth?"
+    ),
+    "general": (
+        "It's great to reconnect and hear about your journey. What's been most significant for you since we last talked?",
+        "I'm curious to learn about your experience. What insights have emerged as you've been implementing changes?",
+        "Thank you for sharing your progress. What feels most important to focus on as you continue growing?",
+        "I appreciate you taking time to reflect on your growth. What would be most helpful to explore today?",
+        "Your continued commitment to growth is inspiring. What's calling for your attention right now?"
+    )
+}
+
+_ICF_COMPETENCY_TABLE = "\n".join(
+    f"- {name}: {guidance}" for name, guidance in _ICF_COMPETENCIES.items()
+)
+
+# Older history is sent as a short summary; only the last two turns go verbatim
+HISTORY_VERBATIM_MESSAGES = 4
+SUMMARY_MAX_POINTS = 3
+SUMMARY_POINT_CHARS = 100
+
+@lru_cache(maxsize=64)
+def _build_system_prompt(topic: str) -> str:
+    """Static part of the system prompt; byte-identical for every turn of a topic, so the
+    model provider can reuse its cached prefix"""
+    return f"""You are a professional ICF-certified executive coach conducting a coaching session.
+
+COACHING TOPIC: {topic}
+
+ICF COMPETENCY GUIDANCE:
+{_ICF_COMPETENCY_TABLE}
+
+COACHING APPROACH:
+- Use powerful, open-ended questions that create awareness
+- Listen for underlying beliefs, patterns, and assumptions
+- Create a safe, non-judgmental space
+- Help the client discover their own insights rather than giving advice
+- Be curious, empathetic, and present
+- Keep responses concise but meaningful (2-3 sentences max)
+- End with a thoughtful question that moves the conversation forward
+
+Respond as a skilled coach would - with genuine curiosity, empathy, and powerful questions that help the client gain clarity and move forward."""
+
+@lru_cache(maxsize=64)
+def _build_focus_prompt(stage: str, competency: str, emotional_state: str) -> str:
+    """Short per-turn trailer naming the current stage, competency and emotional state"""
+    stage_guidance = _STAGE_GUIDANCE.get(stage, "Focus on the client's needs and help them move forward.")
+    return (f"Current focus: {stage} stage, applying {competency}. "
+            f"The client seems {emotional_state}. {stage_guidance}")
+
+def _summarize_history(older_messages: List[Dict[str, str]]) -> str:
+    """One-line summary of earlier client messages (their opening sentence each)"""
+    points = []
+    for msg in older_messages:
+        if msg.get("role") != "user":
+            continue
+        point = msg["content"].strip().split("\n", 1)[0]
+        point = re.split(r"(?<=[.!?])\s", point, maxsplit=1)[0]
+        points.append(point[:SUMMARY_POINT_CHARS])
+    return " | ".join(points[-SUMMARY_MAX_POINTS:])
+
 class OpenAICoachingEngine:
-    def __init__(self, api_key: Optional[str] = None):
-        """Initialize OpenAI coaching engine with intelligent NLP capabilities"""
+    def __init__(self, api_key: Optional[str] = None, http_client: Optional[Any] = None):
+        """Initialize OpenAI coaching engine with intelligent NLP capabilities
+
+        http_client optionally overrides the httpx client used for GitHub Models
+        calls, e.g. to tune connection pool limits.
+        """
         # GitHub Models uses GitHub token instead of OpenAI API key
         # Check for provided token, environment variable, or built-in Codespaces token
         self.github_token = api_key or os.getenv('GITHUB_TOKEN') or os.getenv('GH_TOKEN')
         
-        if not self.github_token:
+        if OpenAI is None:
+            self.demo_mode = True
+            logger.info("openai package not installed - demo mode with intelligent NLP responses")
+        elif not self.github_token:
             # For demo purposes, we'll use a placeholder
             self.github_token = "demo-key-replace-with-github-token"
             self.demo_mode = True
-            print("🤖 DEMO MODE: Using intelligent NLP responses. Set GITHUB_TOKEN to enable GitHub Models.")
+            logger.info("Demo mode with intelligent NLP responses; set GITHUB_TOKEN to enable GitHub Models")
         else:
             self.demo_mode = False
-            print("✅ GITHUB MODELS: Using GitHub Models API for intelligent coaching responses.")
-            print(f"   Token found: {self.github_token[:7]}...{self.github_token[-4:] if len(self.github_token) > 10 else 'short'}")
+            logger.info("Using GitHub Models for coaching responses (token %s...%s)",
+                        self.github_token[:7], self.github_token[-4:] if len(self.github_token) > 10 else 'short')
         
         # Initialize intelligent context analyzer
         try:
             self.context_analyzer = IntelligentContextAnalyzer()
             if INTELLIGENT_NLP_AVAILABLE:
-                print("🧠 FULL INTELLIGENT NLP: Advanced semantic understanding active")
+                logger.debug("Full intelligent NLP context analysis active")
             else:
-                print("🔧 ENHANCED FALLBACK: Basic intelligent responses active")
+                logger.debug("Fallback context analysis active")
         except Exception as e:
-            print(f"⚠️ Context analyzer error: {e}")
+            logger.warning("Context analyzer error: %s", e)
             self.context_analyzer = IntelligentContextAnalyzer()
         
-        self.icf_competencies = {
-            "establishing_trust_and_intimacy": "Create a safe, supportive, and confidential coaching environment. Show genuine care and concern.",
-            "active_listening": "Focus completely on what the client is saying. Listen for meaning, emotion, and what's not being said.",
-            "powerful_questioning": "Ask questions that reveal underlying assumptions, create greater clarity, and move the client forward.",
-            "creating_awareness": "Help the client identify patterns, gain insights, and see new perspectives.",
-            "designing_actions": "Partner with the client to create specific, measurable actions that move them toward their goals.",
-            "managing_progress_and_accountability": "Hold the client accountable and celebrate their progress."
+        # Created on first API call and reused, so its HTTP connection pool
+        # keeps the TLS connection to GitHub Models alive between turns
+        self._client = None
+        self._http_client = http_client
+        
+        self.icf_competencies = _ICF_COMPETENCIES
+        
+        # Circuit breaker state for GitHub Models calls
+        self._breaker_lock = threading.Lock()
+        self._breaker_failures = 0
+        self._breaker_open_until = 0.0
+        
+        # Per-engine generator, so demo picks don't share the module-level random state
+        self._rng = random.Random()
+        
+        # Recently used demo replies and questions (avoid repetition); see reset_conversation_state
+        self._used_responses = RecentChoices(3, self._rng)
+        self._used_action_responses = RecentChoices(4, self._rng)
+        self._used_followup_responses = RecentChoices(4, self._rng)
+        self._conversation_questions_used = 0  # bitmask of question ids; never repeat one within a conversation
+    
+    def _get_client(self):
+        """Return the shared GitHub Models client, creating it on first use"""
+        if self._client is None:
+            self._client = OpenAI(
+                base_url=GITHUB_MODELS_BASE_URL,
+                api_key=self.github_token,
+                timeout=API_TIMEOUT_SECONDS,
+                max_retries=0,
+                http_client=self._http_client
+            )
+        return self._client
+    
+    def _breaker_is_open(self) -> bool:
+        """True while GitHub Models calls are suspended after repeated failures"""
+        if time.monotonic() < self._breaker_open_until:
+            logger.debug("GitHub Models circuit open - using enhanced demo mode")
+            return True
+        return False
+    
+    def _record_api_success(self):
+        with self._breaker_lock:
+            self._breaker_failures = 0
+    
+    def _record_api_failure(self):
+        with self._breaker_lock:
+            self._breaker_failures += 1
+            if self._breaker_failures >= BREAKER_FAILURE_THRESHOLD:
+                self._breaker_open_until = time.monotonic() + BREAKER_COOLDOWN_SECONDS
+                self._breaker_failures = 0
+    
+    def _build_messages(self, context: CoachingContext, user_message: str) -> List[Dict[str, str]]:
+        """Build the chat messages for a coaching turn"""
+        # Static prefix first, then the short per-turn focus
+        static_prefix, dynamic_suffix = self._create_system_prompt(context)
+        messages = [
+            {"role": "system", "content": static_prefix},
+            {"role": "system", "content": dynamic_suffix}
+        ]
+        
+        history = context.conversation_history or []
+        if history and history[-1].get("content") == user_message:
+            history = history[:-1]  # the current message is added below
+        
+        # Older turns as a one-line summary, the last two turns verbatim
+        summary = _summarize_history(history[:-HISTORY_VERBATIM_MESSAGES])
+        if summary:
+            messages.append({"role": "system", "content": f"Summary so far: {summary}"})
+        for msg in history[-HISTORY_VERBATIM_MESSAGES:]:
+            messages.append({"role": msg["role"], "content": msg["content"]})
+        
+        # Add current user message
+        messages.append({"role": "user", "content": user_message})
+        return messages
+    
+    def _build_response(self, context: CoachingContext, user_message: str, coach_response: str) -> Dict[str, Any]:
+        """Wrap a model reply with follow-up questions and the suggested next stage"""
+        # Generate follow-up questions
+        questions = self._generate_follow_up_questions(context, user_message, coach_response)
+        
+        logger.debug("GitHub Models response generated")
+        
+        return {
+            "message": coach_response,
+            "questions": questions,
+            "competency_applied": context.icf_competency,
+            "confidence": 0.9,
+            "suggested_next_stage": self._suggest_next_stage(context, user_message),
+            "demo_mode": False
         }
     
     def generate_coaching_response(self, context: CoachingContext, user_message: str) -> Dict[str, Any]:
         """Generate intelligent coaching response using OpenAI"""
         if self.demo_mode:
-            print("🤖 Using DEMO MODE - Enhanced responses with no repetition")
+            logger.debug("Demo mode response")
+            return self._generate_demo_response(context, user_message)
+        if self._breaker_is_open():
             return self._generate_demo_response(context, user_message)
         
         try:
-            print("🔄 Attempting GitHub Models API call...")
-            
-            # Create conversation messages
-            system_prompt = self._create_system_prompt(context)
-            messages = [{"role": "system", "content": system_prompt}]
-            
-            # Add conversation history (last 5 messages to stay within limits)
-            recent_history = context.conversation_history[-5:] if context.conversation_history else []
-            for msg in recent_history:
-                messages.append({"role": msg["role"], "content": msg["content"]})
-            
-            # Add current user message
-            messages.append({"role": "user", "content": user_message})
+            logger.debug("Calling GitHub Models")
             
             # Generate response using GitHub Models
-            from openai import OpenAI
-            client = OpenAI(
-                base_url="https://models.github.ai/inference",
-                api_key=self.github_token
+            response = self._get_client().chat.completions.create(
+                messages=self._build_messages(context, user_message),
+                **COMPLETION_PARAMS
             )
+            self._record_api_success()
             
-            response = client.chat.completions.create(
-                model="openai/gpt-4o-mini",  # Using mini model for better availability
-                messages=messages,
-                max_tokens=300,
-                temperature=0.7,
-                presence_penalty=0.1,
-                frequency_penalty=0.1
-            )
-            
-            coach_response = response.choices[0].message.content
-            
-            # Generate follow-up questions
-            questions = self._generate_follow_up_questions(context, user_message, coach_response)
-            
-            print("✅ GitHub Models response generated successfully")
-            
-            return {
-                "message": coach_response,
-                "questions": questions,
-                "competency_applied": context.icf_competency,
-                "confidence": 0.9,
-                "suggested_next_stage": self._suggest_next_stage(context, user_message),
-                "demo_mode": False
-            }
+            return self._build_response(context, user_message, response.choices[0].message.content)
             
         except Exception as e:
-            print(f"❌ GitHub Models error: {e}")
-            print("🔄 Falling back to enhanced demo mode...")
+            self._record_api_failure()
+            logger.warning("GitHub Models error, falling back to enhanced demo mode: %s", e)
             return self._generate_demo_response(context, user_message)
     
-    def _create_system_prompt(self, context: CoachingContext) -> str:
-        """Create system prompt for OpenAI based on ICF competencies and context"""
-        competency_guidance = self.icf_competencies.get(context.icf_competency, "")
-        
-        return f"""You are a professional ICF-certified executive coach conducting a coaching session.
-
-CURRENT CONTEXT:
-- Topic: {context.topic}
-- Conversation Stage: {context.stage}
-- ICF Competency Focus: {context.icf_competency}
-- User's Emotional State: {context.user_emotional_state}
-
-ICF COMPETENCY GUIDANCE:
-{competency_guidance}
-
-COACHING APPROACH:
-- Use powerful, open-ended questions that create awareness
-- Listen for underlying beliefs, patterns, and assumptions
-- Create a safe, non-judgmental space
-- Help the client discover their own insights rather than giving advice
-- Be curious, empathetic, and present
-- Keep responses concise but meaningful (2-3 sentences max)
-- End with a thoughtful question that moves the conversation forward
-
-STAGE-SPECIFIC FOCUS:
-{self._get_stage_guidance(context.stage)}
-
-Respond as a skilled coach would - with genuine curiosity, empathy, and powerful questions that help the client gain clarity and move forward."""
-
+    def _create_system_prompt(self, context: CoachingContext) -> Tuple[str, str]:
+        """Create system prompt for OpenAI as (static prefix, dynamic suffix)"""
+        return (
+            _build_system_prompt(context.topic),
+            _build_focus_prompt(context.stage, context.icf_competency, context.user_emotional_state)
+        )
+    
     def _get_stage_guidance(self, stage: str) -> str:
         """Get stage-specific coaching guidance"""
-        stage_guidance = {
-            "intake": "Focus on understanding what the client wants to work on. Create safety and establish the coaching relationship.",
-            "exploration": "Help the client explore the situation deeply. Listen for patterns, emotions, and underlying beliefs.",
-            "reflection": "Help the client gain insights and awareness. Point out patterns and help them see new perspectives.", 
-            "action_planning": "Partner with the client to create specific, actionable steps. Focus on commitment and accountability.",
-            "follow_up": "Review progress, celebrate successes, and adjust plans as needed."
-        }
-        return stage_guidance.get(stage, "Focus on the client's needs and help them move forward.")
+        return _STAGE_GUIDANCE.get(stage, "Focus on the client's needs and help them move forward.")
     
     def _generate_follow_up_questions(self, context: CoachingContext, user_message: str, coach_response: str) -> List[str]:
         """Generate relevant follow-up questions"""
@@ -354,114 +843,51 @@ Respond as a skilled coach would - with genuine curiosity, empathy, and powerful
     
     def _get_contextual_questions(self, stage: str, topic: str, user_message: str) -> List[str]:
         """Get contextual questions based on stage and topic"""
-        questions = {
-            "exploration": [
-                "What else is important about this situation?",
-                "How does this impact other areas of your life?",
-                "What would need to change for this to improve?"
-            ],
-            "reflection": [
-                "What patterns do you notice here?",
-                "What insights are emerging for you?",
-                "How does this align with your values?"
-            ],
-            "action_planning": [
-                "What specific action feels most important right now?",
-                "What support do you need to make this happen?",
-                "How will you know you're successful?"
-            ],
-            "follow_up": [
-                "How has your action plan been working for you?",
-                "What progress have you made since our last conversation?",
-                "What adjustments do you need to make to your approach?",
-                "What additional support would be helpful moving forward?",
-                "How will you maintain momentum on this growth area?"
-            ]
-        }
-        return questions.get(stage, ["Tell me more about that.", "What's most important here?"])
+        return list(_CONTEXTUAL_QUESTIONS.get(stage, ("Tell me more about that.", "What's most important here?")))
     
     def _suggest_next_stage(self, context: CoachingContext, user_message: str) -> str:
         """Intelligently suggest next stage based on conversation content and progress"""
         current_stage = context.stage
         conversation_depth = len(context.conversation_history)
-        user_lower = user_message.lower()
+        features = extract_text_features(user_message)
         
         # Content-based stage progression (more intelligent than just depth)
         if current_stage == "exploration":
             # Move to reflection when user shows self-awareness or insight
-            insight_indicators = [
-                "i notice", "i realize", "i see that", "i understand", "it's because",
-                "the pattern", "what drives this", "i think it's", "maybe it's",
-                "i'm starting to see", "now i understand", "it seems like", "i believe"
-            ]
-            
-            if any(indicator in user_lower for indicator in insight_indicators) or conversation_depth >= 5:
+            if features.has_insight_indicator or conversation_depth >= 5:
                 return "reflection"
                 
         elif current_stage == "reflection":
             # Move to action planning when user expresses readiness or desire for change
-            action_indicators = [
-                "i want to", "i need to", "i should", "what should i do", "how do i",
-                "what's the next step", "i'm ready", "i want to change", "help me",
-                "what can i do", "i'd like to try", "how can i", "that's exactly why",
-                "yes", "absolutely", "let's do it", "i'm ready", "ready to create",
-                "action plan", "let's create", "ready for action", "move forward",
-                "take action", "next step", "what should i do"
-            ]
-            
-            if any(indicator in user_lower for indicator in action_indicators) or conversation_depth >= 7:
+            if features.has_action_indicator or conversation_depth >= 7:
                 return "action_planning"
                 
         elif current_stage == "action_planning":
             # Move to follow-up when user has committed to specific actions
-            commitment_indicators = [
-                "i will", "i'll try", "i commit", "i'm going to", "my goal is",
-                "i'll start", "i'll work on", "i'll practice", "i'll focus on",
-                "as a first step", "i want to not", "if i take", "my plan is",
-                "i'll implement", "i'll apply", "i'll begin", "starting this week",
-                "my action", "i plan to", "i intend to", "i want to pick up",
-                "stretch project", "try my hands", "i want to take on"
-            ]
-            
-            if any(indicator in user_lower for indicator in commitment_indicators) or conversation_depth >= 9:
+            if features.has_commitment_indicator or conversation_depth >= 9:
                 return "follow_up"
         
         return current_stage
     
     def reset_conversation_state(self):
         """Reset conversation state for new coaching session"""
-        if hasattr(self, '_conversation_questions_used'):
-            self._conversation_questions_used.clear()
-        if hasattr(self, '_used_responses'):
-            self._used_responses.clear()
-        if hasattr(self, '_used_action_responses'):
-            self._used_action_responses.clear()
-        if hasattr(self, '_used_followup_responses'):
-            self._used_followup_responses.clear()
+        self._conversation_questions_used = 0
+        self._used_responses.clear()
+        self._used_action_responses.clear()
+        self._used_followup_responses.clear()
+        # Only the fallback analyzer tracks its own replies
         if hasattr(self.context_analyzer, '_used_contextual_responses'):
             self.context_analyzer._used_contextual_responses.clear()
-        print("🔄 Conversation state reset for new coaching session")
+        logger.debug("Conversation state reset for new coaching session")
     
     def _generate_demo_response(self, context: CoachingContext, user_message: str) -> Dict[str, Any]:
         """Generate demo responses when OpenAI API is not available"""
-        user_lower = user_message.lower()
         conversation_depth = len(context.conversation_history)
         current_stage = context.stage
-        
-        # Track used responses to avoid repetition
-        if not hasattr(self, '_used_responses'):
-            self._used_responses = set()
 
         # Handle follow-up stage specifically
         if current_stage == "follow_up":
-            responses = [
-                "I'm so glad to connect with you again! It's wonderful that you've taken steps toward your growth mindset goal. What has been your experience since we last talked?",
-                "Welcome back! I'm curious to hear how things have been going with developing that growth mindset approach to challenges. What have you noticed about yourself?",
-                "It's great to see you again! I'd love to hear about your journey with embracing challenges as growth opportunities. What's been happening for you?",
-                "Thank you for coming back to continue this important work. How has your relationship with new challenges evolved since our last session?",
-                "I'm excited to hear about your progress! What shifts have you noticed in how you approach difficult or unfamiliar tasks?"
-            ]
-            response = self._get_unused_response(responses)
+            response = self._get_unused_response(_FOLLOW_UP_WELCOME_RESPONSES)
             
             return {
                 "message": response,
@@ -484,185 +910,69 @@ Respond as a skilled coach would - with genuine curiosity, empathy, and powerful
             "demo_mode": True
         }
     
-    def _get_unused_response(self, response_options: List[str]) -> str:
+    @staticmethod
+    def _depth_bucket(conversation_depth: int) -> int:
+        """Bucket conversation depth the way the contextual responses progress (1-2, 3-4, 5+)"""
+        if conversation_depth <= 2:
+            return 0
+        return 1 if conversation_depth <= 4 else 2
+    
+    def _get_unused_response(self, response_options: Sequence[str]) -> str:
         """Get a response that hasn't been used recently"""
-        import random
-        
-        # Filter out recently used responses
-        available_responses = [r for r in response_options if r not in self._used_responses]
-        
-        # If all responses have been used, clear the history and use any
-        if not available_responses:
-            self._used_responses.clear()
-            available_responses = response_options
-        
-        # Select a random unused response
-        chosen_response = random.choice(available_responses)
-        self._used_responses.add(chosen_response)
-        
-        # Keep only recent responses in memory (last 3)
-        if len(self._used_responses) > 3:
-            self._used_responses = set(list(self._used_responses)[-3:])
-        
-        return chosen_response
+        return self._used_responses.choose(response_options)
     
     def _get_varied_demo_questions(self, stage: str, conversation_depth: int, user_message: str = "") -> List[str]:
         """Get truly adaptive follow-up questions that build on conversation"""
-        import random
+        features = extract_text_features(user_message or "")
         
-        # Track ALL used questions for this conversation (never repeat)
-        if not hasattr(self, '_conversation_questions_used'):
-            self._conversation_questions_used = set()
+        # Prebuilt candidate ids for this depth and the user's message content
+        candidate_ids = _DEMO_CANDIDATE_QUESTIONS[(
+            self._depth_bucket(conversation_depth),
+            features.has_procrastination,
+            features.has_confidence,
+            features.has_new_task
+        )]
         
-        user_lower = user_message.lower() if user_message else ""
+        # Select 2 questions not yet used in this conversation. Drawing a few random
+        # candidates and skipping used ones avoids filtering the whole pool each turn.
+        used = self._conversation_questions_used
+        selected_ids = []
+        for index in self._rng.sample(range(len(candidate_ids)), min(DEMO_QUESTION_DRAWS, len(candidate_ids))):
+            bit = 1 << candidate_ids[index]
+            if not used & bit:
+                used |= bit
+                selected_ids.append(candidate_ids[index])
+                if len(selected_ids) == 2:
+                    break
         
-        # Create comprehensive question pool organized by purpose
-        question_bank = {
-            # Exploration & Understanding
-            "exploration": [
-                "What beliefs about yourself might be contributing to this situation?",
-                "What thoughts go through your mind when facing these situations?",
-                "What physical sensations do you notice when this happens?",
-                "What stories do you tell yourself in these moments?",
-                "What would your best friend say about this situation?",
-                "What's underneath this challenge for you?",
-                "What does this situation remind you of from your past?",
-                "What are you learning about yourself through this?",
-                "What assumptions might you be making here?",
-                "What's the most surprising thing about this pattern?"
-            ],
-            
-            # Patterns & Awareness
-            "patterns": [
-                "What patterns do you notice about when this happens most?",
-                "When you do feel confident and capable, what's different?",
-                "What circumstances tend to trigger this response?",
-                "How does this show up in other areas of your life?",
-                "What would need to be different for you to feel more confident?",
-                "What environments or situations bring out your best?",
-                "What's worked for you in similar situations before?",
-                "What would someone who knows you well say about your strengths?",
-                "How has this pattern served you in the past?",
-                "What's changed recently that might be affecting this?"
-            ],
-            
-            # Resources & Strengths
-            "resources": [
-                "What resources or support systems do you currently have?",
-                "What skills do you already possess that could help here?",
-                "Who in your life believes in your capabilities?",
-                "What past successes can you draw strength from?",
-                "What would accessing your full potential look like?",
-                "What support would be most helpful right now?",
-                "What internal resources can you tap into?",
-                "What would encourage you to take the next step?",
-                "What would your wisest self advise you to do?",
-                "What energizes you most about making this change?"
-            ],
-            
-            # Action & Implementation
-            "action": [
-                "What feels like the most natural first step for you?",
-                "What small experiment could you try this week?",
-                "What would make taking action feel easier?",
-                "What obstacles do you anticipate, and how might you address them?",
-                "What would accountability look like for you?",
-                "What would motivate you to follow through?",
-                "How could you break this down into smaller pieces?",
-                "What would you need to believe about yourself to move forward?",
-                "What would happen if you trusted yourself more?",
-                "What commitment are you ready to make to yourself?"
-            ],
-            
-            # Success & Vision
-            "success": [
-                "What would it feel like to have overcome this challenge?",
-                "How would others notice the change in you?",
-                "What would become possible if you solved this?",
-                "What impact would this change have on your work/life?",
-                "What legacy do you want to create around this?",
-                "How will you celebrate when you make progress?",
-                "What would your future self thank you for doing now?",
-                "What excites you most about this potential change?",
-                "What would confidence look like in your daily life?",
-                "How would you know you're making real progress?"
-            ],
-            
-            # Context-specific questions based on user content
-            "procrastination": [
-                "What typically happens right before you decide to postpone a task?",
-                "How long do tasks usually sit before you finally tackle them?",
-                "What's the difference between tasks you complete immediately vs. those you postpone?"
-            ],
-            
-            "confidence": [
-                "When was the last time you felt truly confident in your abilities?",
-                "What would need to happen for you to trust yourself more with new challenges?",
-                "How do you typically build confidence when learning something new?"
-            ],
+        if len(selected_ids) < 2:
+            # Most of the pool is used up; take a two-slot reservoir sample of what's left
+            used = self._conversation_questions_used
+            selected_ids = []
+            unused_seen = 0
+            for qid in candidate_ids:
+                if used >> qid & 1:
+                    continue
+                unused_seen += 1
+                if unused_seen <= 2:
+                    selected_ids.append(qid)
+                else:
+                    slot = self._rng.randrange(unused_seen)
+                    if slot < 2:
+                        selected_ids[slot] = qid
             
-            "new_tasks": [
-                "What makes a task feel 'manageable' vs. 'overwhelming' to you?",
-                "How do you usually approach learning something completely new?",
-                "What support would help you feel more prepared for unfamiliar work?"
-            ]
-        }
-        
-        # Determine question categories based on user content and conversation stage
-        primary_categories = []
-        secondary_categories = []
-        
-        # Add context-specific categories based on user's message
-        if "procrastination" in user_lower or "procrastinate" in user_lower:
-            primary_categories.append("procrastination")
-        if "confidence" in user_lower or "doubt" in user_lower:
-            primary_categories.append("confidence")  
-        if "new task" in user_lower or "unfamiliar" in user_lower:
-            primary_categories.append("new_tasks")
+            # If we've somehow exhausted questions
+            if len(selected_ids) < 2:
+                used = 0
+                selected_ids = self._rng.sample(_DEMO_FALLBACK_QUESTION_IDS, min(2, len(_DEMO_FALLBACK_QUESTION_IDS)))
             
-        # Standard categories based on conversation depth
-        if conversation_depth <= 2:
-            primary_categories.extend(["exploration", "patterns"])
-            secondary_categories = ["resources"]
-        elif conversation_depth <= 4:
-            primary_categories.extend(["patterns", "resources"])
-            secondary_categories = ["exploration", "action"]
-        else:
-            primary_categories.extend(["action", "success"])
-            secondary_categories = ["resources", "patterns"]
-        
-        # Collect available questions from relevant categories
-        candidate_questions = []
-        
-        # Add primary category questions
-        for category in primary_categories:
-            if category in question_bank:
-                candidate_questions.extend(question_bank[category])
-        
-        # Add some secondary category questions for variety
-        for category in secondary_categories:
-            if category in question_bank:
-                candidate_questions.extend(question_bank[category][:3])
-        
-        # Filter out questions already used in this conversation
-        available_questions = [q for q in candidate_questions if q not in self._conversation_questions_used]
-        
-        # If we've somehow exhausted questions
-        if len(available_questions) < 2:
-            self._conversation_questions_used.clear()
-            available_questions = [
-                "What insight feels most important right now?",
-                "What would you like to explore further?",
-                "What's calling for your attention in this situation?"
-            ]
-        
-        # Select 2 diverse questions
-        selected_questions = random.sample(available_questions, min(2, len(available_questions)))
+            for qid in selected_ids:
+                used |= 1 << qid
         
         # Mark as used
-        self._conversation_questions_used.update(selected_questions)
+        self._conversation_questions_used = used
         
-        return selected_questions
+        return [_DEMO_ALL_QUESTIONS[qid] for qid in selected_ids]
         
     def _get_intelligent_questions(self, user_message: str, stage: str, conversation_depth: int) -> List[str]:
         """Generate progressive, contextual questions that build on the conversation"""
@@ -680,18 +990,14 @@ Respond as a skilled coach would - with genuine curiosity, empathy, and powerful
         )
         
         # Debug output showing intelligent analysis
-        print(f"🧠 INTELLIGENT ANALYSIS:")
-        print(f"   Original: '{user_message}'")
-        print(f"   Corrected: '{user_context.corrected_text}'")
-        print(f"   Intent: {user_context.intent}")
-        print(f"   Emotions: {user_context.primary_emotions}")
-        print(f"   Challenges: {user_context.challenges_mentioned}")
-        print(f"   Strengths: {user_context.strengths_mentioned}")
-        print(f"   Confidence: {user_context.confidence_level}")
-        print(f"   Readiness: {user_context.readiness_for_action}")
-        print(f"   Themes: {user_context.key_themes}")
-        print(f"   Sentiment: {user_context.sentiment_score}")
-        print(f"   Current Stage: {context.stage}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Intelligent analysis: original=%r corrected=%r intent=%s emotions=%s challenges=%s "
+                "strengths=%s confidence=%s readiness=%s themes=%s sentiment=%s stage=%s",
+                user_message, user_context.corrected_text, user_context.intent, user_context.primary_emotions,
+                user_context.challenges_mentioned, user_context.strengths_mentioned, user_context.confidence_level,
+                user_context.readiness_for_action, user_context.key_themes, user_context.sentiment_score, context.stage
+            )
         
         # Check if we're in action planning or follow-up stage and provide stage-specific responses
         if context.stage == "action_planning":
@@ -706,127 +1012,28 @@ Respond as a skilled coach would - with genuine curiosity, empathy, and powerful
     
     def _generate_action_planning_response_text(self, user_context, conversation_depth: int, user_message: str) -> str:
         """Generate action planning stage specific responses with tracking"""
-        if not hasattr(self, '_used_action_responses'):
-            self._used_action_responses = set()
-        
-        text_lower = user_message.lower()
-        
-        # Action planning focused response options
-        if any(word in text_lower for word in ['ready', 'action plan', 'want to', 'commit', 'yes']):
-            response_options = [
-                "That's wonderful to hear your readiness! What specific action feels most important to focus on first?",
-                "I can sense your commitment to moving forward. What would be the most meaningful first step you could take?",
-                "Your willingness to take action is inspiring. What concrete step could you commit to this week?",
-                "I appreciate your readiness to create change. What action would have the biggest impact on your situation?"
-            ]
-        elif any(word in text_lower for word in ['break down', 'smaller', 'steps', 'plan']):
-            response_options = [
-                "Breaking things down into smaller steps is such a powerful strategy! How might you structure these smaller tasks?",
-                "That approach of breaking complex tasks down shows real insight. What would be your first small step?",
-                "I love how you're thinking about manageable pieces. What's the smallest step you could take to get started?",
-                "Your plan to break things down is excellent. How will you organize these smaller tasks to maintain momentum?"
-            ]
-        elif any(word in text_lower for word in ['fear', 'scared', 'overcome', 'challenge']):
-            response_options = [
-                "Moving through fear takes real courage. What support would help you take that first brave step?",
-                "I hear your determination to overcome these challenges. What would make the first action feel more manageable?",
-                "Your awareness of fear is the first step to moving through it. What would help you feel more prepared?",
-                "It takes strength to face fears head-on. What resources could you tap into to support this change?"
-            ]
-        elif any(word in text_lower for word in ['stretch', 'project', 'try', 'hands on']):
-            response_options = [
-                "A stretch project sounds like a perfect way to put your new approach into practice! What type of project are you considering?",
-                "I love that you want to challenge yourself with something new. What would make this stretch project feel both challenging and achievable?",
-                "Taking on a stretch project shows real growth mindset. How will you approach this differently than you might have before?",
-                "What an excellent way to practice your new skills! What support would help you succeed with this stretch project?"
-            ]
-        else:
-            # General action planning responses
-            response_options = [
-                "Let's focus on turning your insights into action. What specific change would make the biggest difference?",
-                "I can see you're ready to move forward. What concrete step feels most important to commit to?",
-                "Your self-awareness gives you a strong foundation for action. What would you like to focus on implementing?",
-                "What action could you take that would start to shift the patterns we've been discussing?",
-                "How can we translate your insights into specific, actionable steps?",
-                "What would be the most meaningful action you could commit to right now?"
-            ]
-        
-        # Select unused response
-        available_responses = [r for r in response_options if r not in self._used_action_responses]
-        if not available_responses:
-            self._used_action_responses.clear()
-            available_responses = response_options
-        
-        import random
-        chosen_response = random.choice(available_responses)
-        self._used_action_responses.add(chosen_response)
-        
-        # Keep only recent responses in memory
-        if len(self._used_action_responses) > 4:
-            self._used_action_responses = set(list(self._used_action_responses)[-4:])
-        
-        return chosen_response
+        return self._pick_stage_response(
+            user_message, _ACTION_PLANNING_ROUTER, _ACTION_PLANNING_RESPONSES, self._used_action_responses
+        )
     
     def _generate_follow_up_response_text(self, user_context, conversation_depth: int, user_message: str) -> str:
         """Generate follow-up stage specific responses with tracking"""
-        if not hasattr(self, '_used_followup_responses'):
-            self._used_followup_responses = set()
-        
-        text_lower = user_message.lower()
-        
-        # Follow-up focused response options
-        if any(word in text_lower for word in ['progress', 'better', 'working', 'success']):
-            response_options = [
-                "That's fantastic progress! What has been the most surprising part of your journey so far?",
-                "I'm thrilled to hear about your success! What's been the key to making this progress?",
-                "Your progress is inspiring! What difference are you noticing in how you approach challenges now?",
-                "It's wonderful to see your hard work paying off. What would you like to build on next?"
-            ]
-        elif any(word in text_lower for word in ['struggle', 'difficult', 'challenge', 'hard']):
-            response_options = [
-                "Thank you for being honest about the challenges. What support would be most helpful right now?",
-                "I appreciate you sharing what's been difficult. What adjustments might help you move forward?",
-                "It takes courage to acknowledge when things are tough. What have you learned about yourself through these challenges?",
-                "Struggles are part of the growth process. What strengths can you draw on to navigate this?"
-            ]
-        elif any(word in text_lower for word in ['maintain', 'continue', 'momentum', 'keep going']):
-            response_options = [
-                "Maintaining momentum is so important! What systems are helping you stay consistent?",
-                "I love your focus on sustainability. What's working best to keep you motivated?",
-                "Your commitment to continuous progress is admirable. How are you celebrating your wins along the way?",
-                "Consistency is key to lasting change. What habits are you building to support your growth?"
-            ]
-        else:
-            # General follow-up responses
-            response_options = [
-                "It's great to reconnect and hear about your journey. What's been most significant for you since we last talked?",
-                "I'm curious to learn about your experience. What insights have emerged as you've been implementing changes?",
-                "Thank you for sharing your progress. What feels most important to focus on as you continue growing?",
-                "I appreciate you taking time to reflect on your growth. What would be most helpful to explore today?",
-                "Your continued commitment to growth is inspiring. What's calling for your attention right now?"
-            ]
-        
-        # Select unused response
-        available_responses = [r for r in response_options if r not in self._used_followup_responses]
-        if not available_responses:
-            self._used_followup_responses.clear()
-            available_responses = response_options
-        
-        import random
-        chosen_response = random.choice(available_responses)
-        self._used_followup_responses.add(chosen_response)
-        
-        # Keep only recent responses in memory
-        if len(self._used_followup_responses) > 4:
-            self._used_followup_responses = set(list(self._used_followup_responses)[-4:])
-        
-        return chosen_response
+        return self._pick_stage_response(
+            user_message, _FOLLOW_UP_ROUTER, _FOLLOW_UP_RESPONSES, self._used_followup_responses
+        )
+    
+    @staticmethod
+    def _pick_stage_response(user_message: str, router: KeywordRouter,
+                             responses: Mapping[str, Tuple[str, ...]], used: RecentChoices) -> str:
+        """Route the message to a branch of a stage's reply table ("general" when no keyword matches) and pick an unused reply"""
+        branch = router.match(extract_text_features(user_message).lowered) or "general"
+        return used.choose(responses[branch])
             
     def _generate_fallback_response(self, context: CoachingContext, user_message: str) -> Dict[str, Any]:
         """Generate fallback response when OpenAI fails"""
         return {
-            "message": "I appreciate you sharing that with me. This seems really important to you. Can you help me understand what aspect of this situation you'd most like to explore?",
-            "questions": ["What feels most urgent about this?", "What would success look like?"],
+            "message": _API_FALLBACK_MESSAGE,
+            "questions": list(_API_FALLBACK_QUESTIONS),
             "competency_applied": context.icf_competency,
             "confidence": 0.6,
             "suggested_next_stage": context.stage
@@ -0,0 +1,118 @@
+"""
+Semantic Response Cache
+
+Keeps recent coach responses keyed by a lightweight embedding of the message that
+produced them, so a near-duplicate message can be answered without another model
+call. Embeddings are hashed vectors of words and adjacent word pairs, which keeps
+the cache free of extra dependencies and cheap enough to run on every turn. Word
+pairs make the vectors sensitive to word order, and words after a negation are
+marked as negated, so "I am not afraid" and "I am afraid" don't look alike.
+"""
+
+import math
+import re
+import threading
+import zlib
+from collections import deque
+from typing import Any, Dict, Hashable, Iterator, Optional
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+CLAUSE_TOKEN_PATTERN = re.compile(r"[a-z0-9']+|[.,;:!?]")
+NEGATIONS = frozenset({'not', 'no', 'never', 'nor', 'cannot', 'nothing', 'none', 'nobody', 'without'})
+
+
+def text_features(text: str) -> Iterator[str]:
+    """Words and adjacent word pairs of text; words following a negation, up to the
+    end of the clause, are prefixed with 'not_'"""
+    negated = False
+    previous = None
+    for token in CLAUSE_TOKEN_PATTERN.findall(text.lower()):
+        if not token[0].isalnum() and token[0] != "'":
+            # Punctuation ends the clause, and with it any negation and word pair
+            negated, previous = False, None
+            continue
+        if token in NEGATIONS or token.endswith("n't"):
+            negated = True
+            term = token
+        else:
+            if token == 'but':
+                negated = False
+            term = 'not_' + token if negated else token
+        yield term
+        if previous is not None:
+            yield previous + ' ' + term
+        previous = term
+
+
+def embed_text(text: str, dimensions: int = 1024) -> Dict[int, float]:
+    """Embed text as an L2-normalized hashed feature-frequency vector ({bucket: weight})"""
+    counts: Dict[int, float] = {}
+    for feature in text_features(text):
+        # crc32 rather than hash() so buckets are stable across worker processes
+        bucket = zlib.crc32(feature.encode('utf-8')) % dimensions
+        counts[bucket] = counts.get(bucket, 0.0) + 1.0
+
+    norm = math.sqrt(sum(weight * weight for weight in counts.values()))
+    if not norm:
+        return {}
+    return {bucket: weight / norm for bucket, weight in counts.items()}
+
+
+def cosine_similarity(a: Dict[int, float], b: Dict[int, float]) -> float:
+    """Cosine similarity of two normalized sparse vectors"""
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(weight * b.get(bucket, 0.0) for bucket, weight in a.items())
+
+
+class SemanticResponseCache:
+    """Thread-safe nearest-neighbour cache of responses, partitioned by context key"""
+
+    def __init__(self, threshold: float = 0.9, max_entries: int = 256, min_tokens: int = 4):
+        self.threshold = threshold
+        self.max_entries = max_entries  # per partition
+        self.min_tokens = min_tokens  # very short messages ("yes", "ok") depend too much on context
+        self._partitions: Dict[Hashable, deque] = {}
+        self._lock = threading.Lock()
+
+    def embed(self, text: str) -> Optional[Dict[int, float]]:
+        """Embedding used for lookups, or None when text is too short to cache"""
+        if self.max_entries <= 0 or len(TOKEN_PATTERN.findall(text.lower())) < self.min_tokens:
+            return None
+        return embed_text(text) or None
+
+    def get(self, partition: Hashable, text: str) -> Optional[Any]:
+        """Return the cached response most similar to text, if above the threshold"""
+        return self.lookup(partition, self.embed(text))
+
+    def put(self, partition: Hashable, text: str, response: Any) -> None:
+        """Store a response for text; the oldest entry in the partition is evicted when full"""
+        self.store(partition, self.embed(text), response)
+
+    def lookup(self, partition: Hashable, query: Optional[Dict[int, float]]) -> Optional[Any]:
+        """get() for a message already embedded with embed(), so a miss followed by store() embeds it once"""
+        if query is None:
+            return None
+
+        best_response, best_score = None, self.threshold
+        with self._lock:
+            for embedding, response in self._partitions.get(partition, ()):
+                score = cosine_similarity(query, embedding)
+                if score >= best_score:
+                    best_response, best_score = response, score
+        return best_response
+
+    def store(self, partition: Hashable, embedding: Optional[Dict[int, float]], response: Any) -> None:
+        """put() for a message already embedded with embed()"""
+        if embedding is None:
+            return
+
+        with self._lock:
+            entries = self._partitions.get(partition)
+            if entries is None:
+                entries = self._partitions[partition] = deque(maxlen=self.max_entries)
+            entries.append((embedding, response))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._partitions.clear()
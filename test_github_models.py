@@ -3,8 +3,17 @@
 Test script to check if GitHub Models API is working
 """
 import os
+from functools import lru_cache
 from openai import OpenAI
 
+@lru_cache(maxsize=None)
+def get_github_models_client(github_token):
+    """OpenAI client for the GitHub Models endpoint, shared by repeated checks with the same token"""
+    return OpenAI(
+        base_url="https://models.github.ai/inference",
+        api_key=github_token
+    )
+
 def test_github_models():
     """Test GitHub Models API connection"""
     
@@ -18,11 +27,8 @@ def test_github_models():
     print(f"✅ GitHub Token found: {github_token[:7]}...{github_token[-4:]}")
     
     try:
-        # Initialize OpenAI client with GitHub Models endpoint
-        client = OpenAI(
-            base_url="https://models.github.ai/inference",
-            api_key=github_token
-        )
+        # Reuse the OpenAI client (and its connection pool) for the GitHub Models endpoint
+        client = get_github_models_client(github_token)
         
         print("🔄 Testing GitHub Models API connection...")
         